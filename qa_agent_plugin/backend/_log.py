@@ -0,0 +1,11 @@
+"""
+Shared stdlib logger for request-path output
+
+Request handlers log through here instead of rendering rich panels:
+plain %-formatted records cost nothing when the level is off, survive
+journald/JSON log aggregation, and keep rich out of the hot path.
+Rich stays available for CLI banners (main() entry points).
+"""
+import logging
+
+logger = logging.getLogger("qa_agent")
@@ -3,19 +3,242 @@ Action Module - Executes tool calls based on decisions
 Interacts with MCP tools and generates final responses
 """
 import os
+import re
 import sys
 import json
 import asyncio
+import logging
+import string
+import threading
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from google import genai
+from llm_client import get_client
 from google.genai import types
 from rich.console import Console
+from semantic_cache import get_semantic_cache
+
+try:
+    # C-implemented parser, 2-5x faster on the dict-heavy MCP/LLM payloads
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 
 console = Console()
 
+# Leveled logger for the per-tool hot path; handlers are attached at app
+# entry so Rich markup rendering never runs when INFO is disabled
+log = logging.getLogger(__name__)
+
+# Maximum tool calls dispatched concurrently over one MCP session
+MAX_CONCURRENT_TOOLS = 8
+
+# Seconds of inactivity before the cached MCP session is shut down
+SESSION_IDLE_TIMEOUT = 300.0
+
+# Streamed generation chunks are echoed on ~8 KB boundaries to avoid
+# per-token console overhead
+STREAM_BUFFER_BYTES = 8192
+
+# Separator line between documents in the RAG context block
+_DOC_SEPARATOR = "-" * 50 + "\n"
+
+# Gemini context-cache handles keyed by (prefs signature, method); None
+# records that caching was attempted and is unavailable for that prefix.
+# Module scope (like llm_client.get_client) so handles - and negative
+# results - survive the per-request ActionAgent instances on the API
+# path instead of re-attempting a billable create every request
+_prefix_cache: Dict[tuple, Optional[str]] = {}
+_prefix_cache_lock = threading.Lock()
+
+# Per-tool result summary builders: one hash lookup instead of an
+# if/elif ladder on every tool call
+_SUMMARY_BUILDERS = {
+    "analyze_query": lambda r: f"Analyzed query, found {len(r.get('keywords', []))} keywords",
+    "retrieve_documents": lambda r: f"Retrieved {len(r.get('documents', []))} relevant documents",
+    "store_document": lambda r: "Stored document successfully",
+    "verify_answer": lambda r: f"Verification score: {r.get('verification_score', 0)}/100",
+    "get_statistics": lambda r: "Retrieved system statistics",
+}
+
+# Single-pass extraction of an optionally fenced JSON payload
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _strip_code_fence(text: str) -> str:
+    """Return the payload inside an optional ```json fence (single regex pass)"""
+    match = _JSON_FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def _parse_json_response(response_text: str):
+    """
+    Extract and parse the JSON object from an LLM response in one pass
+
+    Handles optional ```json fences via _strip_code_fence and tolerates
+    trailing prose through raw_decode. Raises json.JSONDecodeError when
+    no JSON object can be decoded.
+    """
+    payload = _strip_code_fence(response_text)
+    try:
+        # Fast path: whole payload is valid JSON
+        return _json_loads(payload)
+    except Exception:
+        # Tolerate trailing prose after the JSON object
+        obj, _ = _JSON_DECODER.raw_decode(payload.lstrip())
+        return obj
+
+# Static preference instruction block - only the five preference fields
+# vary, so the template is built once and formatted per request
+PREFERENCE_INSTRUCTIONS_TEMPLATE = """
+**CRITICAL - INCORPORATE THESE USER PREFERENCES IN YOUR ANSWER:**
+
+- **Expertise Level:** {expertise_level}
+  → Adjust technical depth and terminology accordingly
+
+- **Response Style:** {response_style}
+  → If 'concise': Keep it brief and to the point
+  → If 'balanced': Provide clear explanation with key details
+  → If 'detailed': Provide comprehensive, in-depth explanation
+
+- **Depth Preference:** {depth_preference}
+  → If 'shallow': High-level overview only
+  → If 'moderate': Explain main concepts clearly
+  → If 'deep': Explain underlying mechanisms and nuances
+
+- **Focus Areas:** {focus_areas}
+  → Relate answer to these areas when possible
+
+- **Preferred Sources:** {preferred_sources}
+  → Prioritize these types of sources if available
+
+**IMPORTANT:** Your answer MUST reflect these preferences in tone, depth, and style!
+"""
+
+
+# Constant prompt bodies lifted to module scope - only the variable
+# slots are substituted per call, not the whole ~2 KB of text
+_RAG_PROMPT = string.Template("""$prefs
+
+$context
+
+**QUESTION:** $query
+
+**YOUR TASK:**
+Based on the documents above, provide a clear and accurate answer that:
+1. Directly addresses the user's question
+2. Matches their expertise level and preferred style
+3. Incorporates their depth preference
+4. Cites specific information from the documents
+
+**OUTPUT FORMAT:**
+{
+  "answer": "Your preference-aligned answer here...",
+  "confidence": 85,
+  "sources_used": ["source1", "source2"]
+}
+
+Respond ONLY with valid JSON:""")
+
+_LIVE_PROMPT = string.Template("""$prefs
+
+**QUESTION:** $query
+
+**YOUR TASK:**
+Provide a current, accurate answer using live web search that:
+1. Uses the most recent information available
+2. Matches the user's expertise level ($expertise_level)
+3. Follows their preferred response style ($response_style)
+4. Provides appropriate depth ($depth_preference)
+
+Answer the question directly and comprehensively:""")
+
+_KNOWLEDGE_PROMPT = string.Template("""$prefs
+
+**QUESTION:** $query
+
+**YOUR TASK:**
+Provide a clear, accurate answer from your knowledge base that:
+1. Directly addresses the question
+2. Matches the user's expertise level ($expertise_level)
+3. Follows their preferred response style ($response_style)
+4. Provides appropriate depth ($depth_preference)
+5. Relates to their focus areas when relevant: $focus_areas
+
+**OUTPUT FORMAT:**
+{
+  "answer": "Your preference-aligned answer here...",
+  "confidence": 80
+}
+
+Respond ONLY with valid JSON:""")
+
+
+@dataclass(frozen=True, slots=True)
+class _PrefsView:
+    """Preference fields used in prompts, resolved once per request"""
+    expertise_level: str = "intermediate"
+    response_style: str = "balanced"
+    depth_preference: str = "moderate"
+    focus_areas_str: str = "General"
+    preferred_sources_str: str = "Any"
+
+    @classmethod
+    def from_dict(cls, user_prefs: Dict) -> "_PrefsView":
+        return cls(
+            expertise_level=user_prefs.get('expertise_level', 'intermediate'),
+            response_style=user_prefs.get('response_style', 'balanced'),
+            depth_preference=user_prefs.get('depth_preference', 'moderate'),
+            focus_areas_str=', '.join(user_prefs.get('focus_areas', [])) if user_prefs.get('focus_areas') else 'General',
+            preferred_sources_str=', '.join(user_prefs.get('preferred_sources', [])) if user_prefs.get('preferred_sources') else 'Any'
+        )
+
+
+_PROMPT_TEMPLATES = {
+    "RAG": _RAG_PROMPT,
+    "LIVE_SEARCH": _LIVE_PROMPT,
+    "GEMINI_KNOWLEDGE": _KNOWLEDGE_PROMPT,
+}
+
+
+@lru_cache(maxsize=64)
+def _specialize_prompt(method: str, prefs: _PrefsView, preference_instructions: str) -> string.Template:
+    """
+    Partially evaluate a prompt template for one (method, prefs) pair
+
+    The preference block and preference fields are constant across a user's
+    requests, so they are baked into the template text once here; the
+    returned template only has the per-request slots ($query and, for RAG,
+    $context) left to fill — compile-once specialization for the hot path.
+    """
+    base = _PROMPT_TEMPLATES.get(method, _KNOWLEDGE_PROMPT)
+    return string.Template(base.safe_substitute(
+        prefs=preference_instructions,
+        expertise_level=prefs.expertise_level,
+        response_style=prefs.response_style,
+        depth_preference=prefs.depth_preference,
+        focus_areas=prefs.focus_areas_str
+    ))
+
+
+@lru_cache(maxsize=256)
+def _render_preference_instructions(prefs: _PrefsView) -> str:
+    """Render (and memoize) the instruction block for a preference view"""
+    return PREFERENCE_INSTRUCTIONS_TEMPLATE.format(
+        expertise_level=prefs.expertise_level,
+        response_style=prefs.response_style,
+        depth_preference=prefs.depth_preference,
+        focus_areas=prefs.focus_areas_str,
+        preferred_sources=prefs.preferred_sources_str
+    )
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -45,9 +268,9 @@ class ActionOutput(BaseModel):
     method: str = Field(..., description="Method used: RAG, LIVE_SEARCH, GEMINI_KNOWLEDGE")
     needs_another_decision: bool = Field(default=False, description="Whether to loop back to decision")
     user_preferences: Optional[Dict] = Field(None, description="User preferences maintained throughout")
-    
-    class Config:
-        json_schema_extra = {
+
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "tool_results": [
                     {
@@ -65,6 +288,7 @@ class ActionOutput(BaseModel):
                 "needs_another_decision": False
             }
         }
+    )
 
 
 # ============================================================================
@@ -79,35 +303,226 @@ class ActionAgent:
     
     def __init__(self, api_key: str):
         """Initialize action agent with API key"""
-        self.client = genai.Client(api_key=api_key)
-        
+        self.client = get_client(api_key)
+        self._tool_semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOOLS)
+        # Shared across agents (and with api_server) - independent
+        # instances on one file clobbered each other's writes
+        self.answer_cache = get_semantic_cache(self.client)
+        # Cached MCP session shared across execute_actions calls
+        self._session: Optional[ClientSession] = None
+        self._session_stack: Optional[AsyncExitStack] = None
+        self._session_lock = asyncio.Lock()
+        self._idle_task: Optional[asyncio.Task] = None
+
+    async def _get_session(self) -> ClientSession:
+        """
+        Get the shared MCP session, spawning the qa_tools server on first
+        use and reusing the warm subprocess for subsequent queries
+        """
+        async with self._session_lock:
+            if self._session is None:
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                qa_tools_path = os.path.join(script_dir, "qa_tools.py")
+
+                server_params = StdioServerParameters(
+                    command=sys.executable,
+                    args=[qa_tools_path]
+                )
+
+                stack = AsyncExitStack()
+                read, write = await stack.enter_async_context(stdio_client(server_params))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+
+                self._session_stack = stack
+                self._session = session
+                console.print("[green]✓ MCP Server connected (session cached)[/green]")
+
+            self._reset_idle_timer()
+            return self._session
+
+    def _reset_idle_timer(self):
+        """Restart the idle countdown that closes the cached session"""
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+        self._idle_task = asyncio.create_task(self._close_after_idle())
+
+    async def _close_after_idle(self):
+        """Close the cached session after SESSION_IDLE_TIMEOUT of inactivity"""
+        try:
+            await asyncio.sleep(SESSION_IDLE_TIMEOUT)
+            await self.aclose()
+        except asyncio.CancelledError:
+            pass
+
+    async def aclose(self):
+        """Explicitly shut down the cached MCP session and its subprocess"""
+        async with self._session_lock:
+            if self._idle_task is not None:
+                # When the idle timer itself invokes aclose, cancelling it
+                # would inject CancelledError into the stack close below
+                if self._idle_task is not asyncio.current_task():
+                    self._idle_task.cancel()
+                self._idle_task = None
+            if self._session_stack is not None:
+                try:
+                    await self._session_stack.aclose()
+                except Exception as e:
+                    console.print(f"[yellow]⚠️  Error closing MCP session: {e}[/yellow]")
+                finally:
+                    # Drop the cached handles even on a failed close so
+                    # _get_session never hands out a half-closed session
+                    self._session = None
+                    self._session_stack = None
+
+    def _build_preference_instructions(self, user_prefs: Dict) -> str:
+        """Render the static preference instruction block for a prefs dict"""
+        if not user_prefs:
+            return ""
+        return _render_preference_instructions(_PrefsView.from_dict(user_prefs))
+
+    def _get_cached_prefix(self, preference_instructions: str, method: str, prefs_sig: str) -> Optional[str]:
+        """
+        Get (creating once) a Gemini context-cache handle for the static
+        instruction prefix, so the provider reuses KV state across calls
+
+        Returns the cache name, or None when context caching is unavailable
+        (e.g. prefix below the provider's minimum cacheable size). Blocking
+        HTTP on a miss - call via asyncio.to_thread from async code.
+        """
+        key = (prefs_sig, method)
+        with _prefix_cache_lock:
+            if key not in _prefix_cache:
+                try:
+                    cache = self.client.caches.create(
+                        model="gemini-2.0-flash",
+                        config=types.CreateCachedContentConfig(
+                            contents=[preference_instructions]
+                        )
+                    )
+                    _prefix_cache[key] = cache.name
+                    console.print("[green]✓ Prompt prefix cached with provider[/green]")
+                except Exception as e:
+                    console.print(f"[yellow]⚠️  Context caching unavailable, inlining prefix: {e}[/yellow]")
+                    _prefix_cache[key] = None
+            return _prefix_cache[key]
+
+    def _stream_generate(self, prompt: str, config: Optional[types.GenerateContentConfig] = None) -> str:
+        """
+        Stream a Gemini generation instead of blocking on the full response
+
+        Chunks are echoed to the console in buffered flushes as they
+        arrive (lower perceived latency) and assembled into the complete
+        response text for the caller.
+        """
+        chunks: List[str] = []
+        flush_start = 0
+        pending = 0
+
+        for chunk in self.client.models.generate_content_stream(
+            model="gemini-2.0-flash",
+            contents=prompt,
+            config=config
+        ):
+            if chunk.text:
+                chunks.append(chunk.text)
+                pending += len(chunk.text)
+                if pending >= STREAM_BUFFER_BYTES:
+                    console.print("".join(chunks[flush_start:]), end="")
+                    flush_start = len(chunks)
+                    pending = 0
+
+        # Echo whatever arrived after the last buffer boundary
+        if flush_start < len(chunks):
+            console.print("".join(chunks[flush_start:]), end="")
+
+        return "".join(chunks)
+
+    def _summarize_tool_result(self, tool_name: str, result_data: Dict) -> str:
+        """Build a brief human-readable summary for a tool result"""
+        builder = _SUMMARY_BUILDERS.get(tool_name)
+        if builder is None:
+            return f"Executed {tool_name} successfully"
+        return builder(result_data)
+
+    async def _execute_batch(self, session: ClientSession, group: List) -> List[ToolResult]:
+        """
+        Execute a priority group as one batch_execute round-trip, fanning
+        the consolidated result back into per-tool ToolResult objects
+        """
+        try:
+            log.info("→ Executing batch of %d tools", len(group))
+
+            result = await session.call_tool("batch_execute", arguments={
+                "calls": [{"tool": tc.tool_name, "args": tc.arguments} for tc in group],
+                "max_concurrent": MAX_CONCURRENT_TOOLS
+            })
+            batch_data = _json_loads(result.content[0].text)
+            entries = batch_data.get("results", [])
+        except Exception as e:
+            # Server without batch_execute (or transport error): fall back
+            # to concurrent per-tool dispatch
+            log.warning("⚠️  batch_execute unavailable, dispatching per tool: %s", e)
+            return await asyncio.gather(
+                *[
+                    self._execute_mcp_tool(session, tc.tool_name, tc.arguments)
+                    for tc in group
+                ],
+                return_exceptions=True
+            )
+
+        tool_results = []
+        for tc, entry in zip(group, entries):
+            if entry.get("success"):
+                result_data = entry.get("result", {})
+                summary = self._summarize_tool_result(tc.tool_name, result_data)
+                log.info("✓ %s", summary)
+                tool_results.append(ToolResult.model_construct(
+                    tool_name=tc.tool_name,
+                    success=True,
+                    result=result_data,
+                    result_summary=summary
+                ))
+            else:
+                error = entry.get("error", "unknown error")
+                log.warning("❌ Error executing %s: %s", tc.tool_name, error)
+                tool_results.append(ToolResult.model_construct(
+                    tool_name=tc.tool_name,
+                    success=False,
+                    result={},
+                    error=error,
+                    result_summary=f"Failed: {error}"
+                ))
+
+        # Pad if the server returned fewer entries than calls
+        for tc in group[len(entries):]:
+            tool_results.append(ToolResult.model_construct(
+                tool_name=tc.tool_name,
+                success=False,
+                result={},
+                error="No result returned from batch",
+                result_summary="Failed: No result returned from batch"
+            ))
+
+        return tool_results
+
     async def _execute_mcp_tool(self, session: ClientSession, tool_name: str, arguments: Dict) -> ToolResult:
+        """Execute a single MCP tool call (bounded by the concurrency semaphore)"""
+        async with self._tool_semaphore:
+            return await self._execute_mcp_tool_unbounded(session, tool_name, arguments)
+
+    async def _execute_mcp_tool_unbounded(self, session: ClientSession, tool_name: str, arguments: Dict) -> ToolResult:
         """Execute a single MCP tool call"""
         try:
-            console.print(f"[yellow]→ Executing: {tool_name}[/yellow]")
-            
+            log.info("→ Executing: %s", tool_name)
+
             result = await session.call_tool(tool_name, arguments=arguments)
-            result_data = json.loads(result.content[0].text)
-            
-            # Create summary based on tool
-            if tool_name == "analyze_query":
-                summary = f"Analyzed query, found {len(result_data.get('keywords', []))} keywords"
-            elif tool_name == "retrieve_documents":
-                doc_count = len(result_data.get('documents', []))
-                summary = f"Retrieved {doc_count} relevant documents"
-            elif tool_name == "store_document":
-                summary = f"Stored document successfully"
-            elif tool_name == "verify_answer":
-                score = result_data.get('verification_score', 0)
-                summary = f"Verification score: {score}/100"
-            elif tool_name == "get_statistics":
-                summary = f"Retrieved system statistics"
-            else:
-                summary = f"Executed {tool_name} successfully"
-            
-            console.print(f"[green]✓ {summary}[/green]")
+            result_data = _json_loads(result.content[0].text)
+
+            summary = self._summarize_tool_result(tool_name, result_data)
+            log.info("✓ %s", summary)
             
-            return ToolResult(
+            return ToolResult.model_construct(
                 tool_name=tool_name,
                 success=True,
                 result=result_data,
@@ -115,8 +530,8 @@ class ActionAgent:
             )
             
         except Exception as e:
-            console.print(f"[red]❌ Error executing {tool_name}: {e}[/red]")
-            return ToolResult(
+            log.warning("❌ Error executing %s: %s", tool_name, e)
+            return ToolResult.model_construct(
                 tool_name=tool_name,
                 success=False,
                 result={},
@@ -130,107 +545,117 @@ class ActionAgent:
         memory_output: Any,
         tool_results: List[ToolResult],
         method: str
+    ) -> tuple[str, List[str], float]:
+        """
+        Generate final answer, consulting the semantic cache first
+
+        Returns:
+            (answer, sources, confidence)
+        """
+        user_prefs = memory_output.user_preferences or {}
+
+        # CAG short-circuit: memory already carries a near-identical past
+        # interaction, so reuse its answer and skip the LLM entirely
+        cag_hit = memory_output.cag_lookup(query) if hasattr(memory_output, "cag_lookup") else None
+        if cag_hit is not None:
+            console.print("[green]✓ CAG: reusing answer from conversation memory[/green]")
+            return cag_hit
+
+        # lookup/store embed the query (blocking HTTP) and store rewrites
+        # the cache file - keep both off the event loop, as api_server
+        # does for its SemanticCache
+        cached = await asyncio.to_thread(self.answer_cache.lookup, query, method, user_prefs)
+        if cached is not None:
+            return cached
+
+        answer, sources, confidence = await self._generate_final_answer_uncached(
+            query, memory_output, tool_results, method
+        )
+
+        # Only cache successful generations
+        if confidence > 0:
+            await asyncio.to_thread(
+                self.answer_cache.store, query, method, user_prefs, answer, sources, confidence
+            )
+
+        return (answer, sources, confidence)
+
+    async def _generate_final_answer_uncached(
+        self,
+        query: str,
+        memory_output: Any,
+        tool_results: List[ToolResult],
+        method: str
     ) -> tuple[str, List[str], float]:
         """
         Generate final answer incorporating user preferences
-        
+
         Returns:
             (answer, sources, confidence)
         """
         try:
             console.print("[yellow]→ Generating final answer with user preferences...[/yellow]")
             
-            # Extract user preferences
+            # Extract user preferences and resolve prompt fields once
             user_prefs = memory_output.user_preferences or {}
-            
-            # Build preference-aware prompt
-            preference_instructions = ""
-            if user_prefs:
-                preference_instructions = f"""
-**CRITICAL - INCORPORATE THESE USER PREFERENCES IN YOUR ANSWER:**
+            prefs = _PrefsView.from_dict(user_prefs)
 
-- **Expertise Level:** {user_prefs.get('expertise_level', 'intermediate')}
-  → Adjust technical depth and terminology accordingly
-  
-- **Response Style:** {user_prefs.get('response_style', 'balanced')}
-  → If 'concise': Keep it brief and to the point
-  → If 'balanced': Provide clear explanation with key details
-  → If 'detailed': Provide comprehensive, in-depth explanation
-  
-- **Depth Preference:** {user_prefs.get('depth_preference', 'moderate')}
-  → If 'shallow': High-level overview only
-  → If 'moderate': Explain main concepts clearly
-  → If 'deep': Explain underlying mechanisms and nuances
-  
-- **Focus Areas:** {', '.join(user_prefs.get('focus_areas', [])) if user_prefs.get('focus_areas') else 'General'}
-  → Relate answer to these areas when possible
-  
-- **Preferred Sources:** {', '.join(user_prefs.get('preferred_sources', [])) if user_prefs.get('preferred_sources') else 'Any'}
-  → Prioritize these types of sources if available
+            # Build preference-aware prompt; when the provider-side prefix
+            # cache holds the instruction block, only the dynamic tail is sent
+            preference_instructions = self._build_preference_instructions(user_prefs)
+            cached_prefix = None
+            if preference_instructions:
+                prefs_sig = json.dumps(user_prefs, sort_keys=True, default=str)
+                # caches.create is a sync SDK call - keep it off the loop
+                cached_prefix = await asyncio.to_thread(
+                    self._get_cached_prefix, preference_instructions, method, prefs_sig
+                )
+                if cached_prefix:
+                    preference_instructions = ""
 
-**IMPORTANT:** Your answer MUST reflect these preferences in tone, depth, and style!
-"""
-            
             # Determine method and build context
+            # Index tool results once for O(1) lookups instead of scans
+            results_by_name = {r.tool_name: r for r in tool_results}
+
             if method == "RAG":
                 # Find retrieved documents
-                documents = []
-                for result in tool_results:
-                    if result.tool_name == "retrieve_documents" and result.success:
-                        documents = result.result.get("documents", [])
-                        break
-                
+                retrieval = results_by_name.get("retrieve_documents")
+                documents = retrieval.result.get("documents", []) if retrieval and retrieval.success else []
+
+
                 if documents:
-                    # Build context from documents
-                    context = "\n\n=== RETRIEVED DOCUMENTS ===\n"
-                    sources = []
+                    # Build context from documents with a single join
+                    # instead of quadratic string concatenation
+                    parts = ["\n\n=== RETRIEVED DOCUMENTS ===\n"]
                     for i, doc in enumerate(documents, 1):
-                        context += f"\nDocument {i}: {doc.get('title', 'Untitled')}\n"
-                        context += f"Content: {doc.get('content', '')[:500]}...\n"
-                        context += f"URL: {doc.get('url', 'N/A')}\n"
-                        context += "-" * 50 + "\n"
-                        sources.append(doc.get('title', 'Unknown'))
+                        # Prefer the pre-capped preview from the tool; only
+                        # slice when falling back to full content, and only
+                        # when it actually exceeds the cap
+                        snippet = doc.get('content_preview')
+                        if snippet is None:
+                            content = doc.get('content', '')
+                            snippet = content if len(content) <= 500 else content[:500] + '...'
+                        parts.append(f"\nDocument {i}: {doc.get('title', 'Untitled')}\n")
+                        parts.append(f"Content: {snippet}\n")
+                        parts.append(f"URL: {doc.get('url', 'N/A')}\n")
+                        parts.append(_DOC_SEPARATOR)
+                    context = "".join(parts)
+                    sources = [doc.get('title', 'Unknown') for doc in documents]
                     
-                    prompt = f"""{preference_instructions}
-
-{context}
-
-**QUESTION:** {query}
-
-**YOUR TASK:**
-Based on the documents above, provide a clear and accurate answer that:
-1. Directly addresses the user's question
-2. Matches their expertise level and preferred style
-3. Incorporates their depth preference
-4. Cites specific information from the documents
+                    prompt = _specialize_prompt(method, prefs, preference_instructions).safe_substitute(
+                        context=context,
+                        query=query
+                    )
 
-**OUTPUT FORMAT:**
-{{
-  "answer": "Your preference-aligned answer here...",
-  "confidence": 85,
-  "sources_used": ["source1", "source2"]
-}}
+                    # Run the blocking SDK call off the event loop so MCP IO
+                    # and parallel tool calls keep making progress
+                    response_text = await asyncio.to_thread(
+                        self._stream_generate,
+                        prompt,
+                        config=types.GenerateContentConfig(cached_content=cached_prefix) if cached_prefix else None
+                    ) or "{}"
 
-Respond ONLY with valid JSON:"""
-                    
-                    response = self.client.models.generate_content(
-                        model="gemini-2.0-flash",
-                        contents=prompt
-                    )
-                    
-                    response_text = response.text if response and response.text else "{}"
-                    
-                    # Parse response
-                    if "```json" in response_text:
-                        json_start = response_text.find("```json") + 7
-                        json_end = response_text.find("```", json_start)
-                        response_text = response_text[json_start:json_end].strip()
-                    elif "```" in response_text:
-                        json_start = response_text.find("```") + 3
-                        json_end = response_text.find("```", json_start)
-                        response_text = response_text[json_start:json_end].strip()
-                    
-                    result = json.loads(response_text)
+                    result = _parse_json_response(response_text)
                     return (
                         result.get("answer", response_text),
                         sources,
@@ -241,73 +666,36 @@ Respond ONLY with valid JSON:"""
                 # Use Google Search Grounding
                 console.print("[cyan]🌐 Using Google Search Grounding for live data...[/cyan]")
                 
-                search_prompt = f"""{preference_instructions}
-
-**QUESTION:** {query}
-
-**YOUR TASK:**
-Provide a current, accurate answer using live web search that:
-1. Uses the most recent information available
-2. Matches the user's expertise level ({user_prefs.get('expertise_level', 'intermediate')})
-3. Follows their preferred response style ({user_prefs.get('response_style', 'balanced')})
-4. Provides appropriate depth ({user_prefs.get('depth_preference', 'moderate')})
-
-Answer the question directly and comprehensively:"""
+                search_prompt = _specialize_prompt(method, prefs, preference_instructions).safe_substitute(
+                    query=query
+                )
                 
-                response = self.client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=search_prompt,
+                answer = await asyncio.to_thread(
+                    self._stream_generate,
+                    search_prompt,
                     config=types.GenerateContentConfig(
                         tools=[types.Tool(google_search=types.GoogleSearch())],
-                        response_modalities=["TEXT"]
+                        response_modalities=["TEXT"],
+                        cached_content=cached_prefix
                     )
-                )
-                
-                answer = response.text if response and response.text else "Could not retrieve live data"
+                ) or "Could not retrieve live data"
                 return (answer, ["Google Search (Live Web Data)"], 85.0)
             
             else:  # GEMINI_KNOWLEDGE
                 console.print("[cyan]🧠 Using Gemini's general knowledge...[/cyan]")
                 
-                knowledge_prompt = f"""{preference_instructions}
-
-**QUESTION:** {query}
-
-**YOUR TASK:**
-Provide a clear, accurate answer from your knowledge base that:
-1. Directly addresses the question
-2. Matches the user's expertise level ({user_prefs.get('expertise_level', 'intermediate')})
-3. Follows their preferred response style ({user_prefs.get('response_style', 'balanced')})
-4. Provides appropriate depth ({user_prefs.get('depth_preference', 'moderate')})
-5. Relates to their focus areas when relevant: {', '.join(user_prefs.get('focus_areas', [])) if user_prefs.get('focus_areas') else 'General'}
+                knowledge_prompt = _specialize_prompt(method, prefs, preference_instructions).safe_substitute(
+                    query=query
+                )
 
-**OUTPUT FORMAT:**
-{{
-  "answer": "Your preference-aligned answer here...",
-  "confidence": 80
-}}
+                response_text = await asyncio.to_thread(
+                    self._stream_generate,
+                    knowledge_prompt,
+                    config=types.GenerateContentConfig(cached_content=cached_prefix) if cached_prefix else None
+                ) or "{}"
 
-Respond ONLY with valid JSON:"""
-                
-                response = self.client.models.generate_content(
-                    model="gemini-2.0-flash",
-                    contents=knowledge_prompt
-                )
-                
-                response_text = response.text if response and response.text else "{}"
-                
-                # Parse response
-                if "```json" in response_text:
-                    json_start = response_text.find("```json") + 7
-                    json_end = response_text.find("```", json_start)
-                    response_text = response_text[json_start:json_end].strip()
-                elif "```" in response_text:
-                    json_start = response_text.find("```") + 3
-                    json_end = response_text.find("```", json_start)
-                    response_text = response_text[json_start:json_end].strip()
-                
                 try:
-                    result = json.loads(response_text)
+                    result = _parse_json_response(response_text)
                     return (
                         result.get("answer", response_text),
                         ["Gemini AI Knowledge Base"],
@@ -322,80 +710,162 @@ Respond ONLY with valid JSON:"""
             traceback.print_exc()
             return (f"Error generating answer: {str(e)}", [], 0.0)
     
-    async def execute_actions(self, action_input: ActionInput) -> ActionOutput:
+    async def execute_tool_calls(self, tool_call_stream) -> List[ToolResult]:
+        """
+        Execute tool calls as a streaming decision yields them
+
+        Consumes DecisionAgent.stream_tool_calls: each call is dispatched
+        on the MCP session the moment the model emits it, so the first
+        tool's I/O overlaps the remainder of the decision generation.
+        Priority ordering is preserved as in execute_actions: calls
+        sharing a priority run concurrently, and a priority change in
+        the stream drains the in-flight group before dispatching the
+        next (higher numbers are reserved for dependent steps).
+        Results are returned in emission order; pass them to
+        execute_actions via tool_results to skip its own dispatch.
+        """
+        session = None
+        results: List[ToolResult] = []
+        group_tasks = []
+        group_priority = None
+        async for tool_call in tool_call_stream:
+            if session is None:
+                session = await self._get_session()
+            if group_priority is not None and tool_call.priority != group_priority:
+                # New priority group - dependent steps wait for the
+                # previous group's results
+                results.extend(await asyncio.gather(*group_tasks))
+                group_tasks = []
+            group_priority = tool_call.priority
+            group_tasks.append(asyncio.create_task(
+                self._execute_mcp_tool(session, tool_call.tool_name, tool_call.arguments)
+            ))
+        if group_tasks:
+            # _execute_mcp_tool wraps its own failures in a ToolResult
+            results.extend(await asyncio.gather(*group_tasks))
+        return results
+
+    async def execute_actions(self, action_input: ActionInput, tool_results: Optional[List[ToolResult]] = None) -> ActionOutput:
         """
         Execute all decided actions and generate final response
-        
+
         Args:
             action_input: ActionInput with decision and memory
-            
+            tool_results: Results already produced by execute_tool_calls
+                (streaming dispatch); when given, no tools are re-run here
+
         Returns:
             ActionOutput with results and final answer
         """
         try:
             console.print("[bold cyan]⚡ ACTION: Executing tools...[/bold cyan]")
-            
+
             decision = action_input.from_decision
             memory_output = action_input.from_memory
-            tool_results = []
+            pre_executed = tool_results is not None
+            tool_results = list(tool_results) if pre_executed else []
             reasoning_steps = []
-            
+
             # Maintain user preferences throughout
             user_prefs = decision.user_preferences
             
-            # Determine method
-            method = memory_output.suggested_method
-            if memory_output.requires_live_data:
-                method = "LIVE_SEARCH"
-            elif memory_output.has_sufficient_context:
-                method = "RAG"
-            else:
-                method = "GEMINI_KNOWLEDGE"
-            
+            # Determine method (the if/elif/else always decided, so the
+            # suggested_method read was dead)
+            method = (
+                "LIVE_SEARCH" if memory_output.requires_live_data
+                else "RAG" if memory_output.has_sufficient_context
+                else "GEMINI_KNOWLEDGE"
+            )
+
             reasoning_steps.append(f"[METHOD_SELECT] Using {method} approach")
-            
+
+            # Speculative pipeline: once retrieval results are in, answer
+            # generation starts while remaining tool groups (verification,
+            # statistics, ...) are still executing
+            generation_task = None
+
             # Execute tool calls if any
-            if decision.should_call_tool and decision.tool_calls:
-                # Get MCP server path
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                qa_tools_path = os.path.join(script_dir, "qa_tools.py")
-                
-                server_params = StdioServerParameters(
-                    command=sys.executable,
-                    args=[qa_tools_path]
-                )
-                
-                # Execute tools
-                async with stdio_client(server_params) as (read, write):
-                    async with ClientSession(read, write) as session:
-                        await session.initialize()
-                        console.print("[green]✓ MCP Server connected[/green]")
-                        
-                        # Execute each tool in order
-                        for tool_call in sorted(decision.tool_calls, key=lambda x: x.priority):
-                            result = await self._execute_mcp_tool(
-                                session,
-                                tool_call.tool_name,
-                                tool_call.arguments
+            if pre_executed:
+                # Calls were already dispatched against the streaming
+                # decision; just fold their results in
+                for result in tool_results:
+                    reasoning_steps.append(f"[TOOL_EXEC] {result.result_summary}")
+            elif decision.should_call_tool and decision.tool_calls:
+                # Reuse the warm MCP session instead of spawning a new
+                # qa_tools subprocess per query
+                session = await self._get_session()
+
+                # Group tool calls by priority - calls sharing a priority
+                # are independent, so dispatch each group concurrently
+                # while preserving priority ordering between groups
+                priority_groups: Dict[int, List] = {}
+                for tool_call in decision.tool_calls:
+                    priority_groups.setdefault(tool_call.priority, []).append(tool_call)
+
+                for priority in sorted(priority_groups.keys()):
+                    group = priority_groups[priority]
+                    if len(group) > 1:
+                        # One batch_execute round-trip for the whole group
+                        group_results = await self._execute_batch(session, group)
+                    else:
+                        group_results = await asyncio.gather(
+                            *[
+                                self._execute_mcp_tool(session, tc.tool_name, tc.arguments)
+                                for tc in group
+                            ],
+                            return_exceptions=True
+                        )
+
+                    for tc, result in zip(group, group_results):
+                        if isinstance(result, BaseException):
+                            result = ToolResult.model_construct(
+                                tool_name=tc.tool_name,
+                                success=False,
+                                result={},
+                                error=str(result),
+                                result_summary=f"Failed: {str(result)}"
+                            )
+                        tool_results.append(result)
+                        reasoning_steps.append(f"[TOOL_EXEC] {result.result_summary}")
+
+                    # Start generating the answer as soon as the
+                    # retrieval group lands instead of waiting for
+                    # the whole tool sequence to finish
+                    if generation_task is None and any(
+                        r.tool_name == "retrieve_documents" and r.success
+                        for r in tool_results
+                    ):
+                        reasoning_steps.append("[PIPELINE] Retrieval complete - answer generation started early")
+                        generation_task = asyncio.create_task(
+                            self._generate_final_answer(
+                                query=memory_output.original_query,
+                                memory_output=memory_output,
+                                tool_results=list(tool_results),
+                                method=method
                             )
-                            tool_results.append(result)
-                            reasoning_steps.append(f"[TOOL_EXEC] {result.result_summary}")
+                        )
             
-            # Generate final answer
+            # Generate final answer (or collect the pipelined generation)
             reasoning_steps.append("[ANSWER_GEN] Generating final answer with user preferences")
-            
-            final_answer, sources, confidence = await self._generate_final_answer(
-                query=memory_output.original_query,
-                memory_output=memory_output,
-                tool_results=tool_results,
-                method=method
-            )
+
+            if generation_task is not None:
+                final_answer, sources, confidence = await generation_task
+            else:
+                final_answer, sources, confidence = await self._generate_final_answer(
+                    query=memory_output.original_query,
+                    memory_output=memory_output,
+                    tool_results=tool_results,
+                    method=method
+                )
             
             # Verify answer if verify_answer tool was called
-            for result in tool_results:
-                if result.tool_name == "verify_answer" and result.success:
-                    verify_score = result.result.get("verification_score", 0)
-                    reasoning_steps.append(f"[VERIFICATION] Answer verified with score {verify_score}/100")
+            verify_result = next(
+                (r for r in tool_results if r.tool_name == "verify_answer" and r.success),
+                None
+            )
+            if verify_result is not None:
+                verify_score = verify_result.result.get("verification_score", 0)
+                reasoning_steps.append(f"[VERIFICATION] Answer verified with score {verify_score}/100")
             
             reasoning_steps.append(f"[COMPLETE] Final answer generated with {confidence}% confidence")
             
@@ -476,7 +946,8 @@ if __name__ == "__main__":
         action_agent = ActionAgent(api_key=api_key)
         action_input = ActionInput(from_decision=decision_output, from_memory=memory_output)
         action_output = await action_agent.execute_actions(action_input)
-        
+        await action_agent.aclose()
+
         console.print(f"\n[bold green]Final Answer:[/bold green]")
         console.print(action_output.final_answer)
         console.print(f"\n[bold cyan]Method:[/bold cyan] {action_output.method}")
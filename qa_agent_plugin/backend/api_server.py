@@ -6,23 +6,77 @@ Perception → Memory → Decision ↔ Action with User Preferences
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Final, Optional, Dict, Any, List
 import asyncio
+import concurrent.futures
+import hashlib
+import json
+import logging
 import uvicorn
 from rich.console import Console
 from rich.panel import Panel
 import sys
 import os
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+# Streaming JSON parser for counting entries without materializing the
+# whole file; falls back to a full parse when unavailable
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# orjson's C parser for decoding MCP tool results; stdlib fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
 
 # Import new agentic architecture
-from main import QAAgentOrchestrator, process_query_api
+from main import QAAgentOrchestrator, process_query_api, process_query_api_stream
 from perception import UserPreference
 from memory import MemoryAgent
+from semantic_cache import SemanticCache, get_semantic_cache
+
+# Environment is loaded at import so the key is a plain constant and the
+# startup coroutine never blocks the loop on dotenv file I/O
+from dotenv import load_dotenv
+load_dotenv()
+API_KEY: Final[str] = os.getenv("GEMINI_API_KEY", "")
 
 console = Console()
 
-app = FastAPI(title="QA Agent API - Agentic", version="2.0.0")
+# Request handlers log through the shared stdlib logger; rich is kept
+# only for the CLI banner in main(). Set LOG_LEVEL=debug for per-request
+# detail.
+from _log import logger as log
+
+# ORJSONResponse: C-level JSON encoding and no redundant response-model
+# re-validation on the hot endpoints
+app = FastAPI(title="QA Agent API - Agentic", version="2.0.0", default_response_class=ORJSONResponse)
+
+class _GzipExceptSSE(GZipMiddleware):
+    """GZip responses, but pass SSE streams through uncompressed.
+
+    GZip buffering delays individual SSE events, defeating streaming.
+    """
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/ask/stream":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# /ask payloads embed reasoning_flow + answer and run to multiple KB;
+# compress anything over 1 KB for non-loopback clients
+app.add_middleware(_GzipExceptSSE, minimum_size=1024, compresslevel=5)
 
 # Enable CORS for Chrome extension
 app.add_middleware(
@@ -33,20 +87,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request models
+# Request models - unknown fields are dropped instead of failing
+# validation, keeping per-request validation work minimal
 class QuestionRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     question: str
     user_preferences: Optional[Dict] = None
     conversation_history: Optional[List[Dict]] = None
 
 class PageContentRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
     title: str
     url: str
     content: str
     timestamp: Optional[str] = None
 
+class BatchPageContentRequest(BaseModel):
+    """Batch of pages to store in one MCP round trip"""
+    model_config = ConfigDict(extra='ignore')
+
+    items: List[PageContentRequest]
+
 class UserPreferenceRequest(BaseModel):
     """Request to set/update user preferences"""
+    model_config = ConfigDict(extra='ignore')
+
     preferred_language: str = "English"
     expertise_level: str = "intermediate"
     response_style: str = "balanced"
@@ -57,10 +124,155 @@ class UserPreferenceRequest(BaseModel):
     depth_preference: str = "moderate"
 
 # Global state
-total_queries = 0
-successful_queries = 0
+# Lock-protected counters so increments stay atomic across the executor
+# threads within a worker. Note they are still per-worker: uvicorn.run()
+# is handed an import string, so each worker process re-imports this
+# module and builds its own Value. For true cross-worker totals move
+# these to a shared store (see the workers comment in main()).
+from multiprocessing import Value
+total_queries_c = Value('Q', 0)
+successful_queries_c = Value('Q', 0)
+
+
+def _inc(counter):
+    """Atomic increment of a shared counter"""
+    with counter.get_lock():
+        counter.value += 1
+
+
 current_user_preferences = None  # Store user preferences
-api_key = None
+current_user_preferences_dump = None  # Dump cached on write so reads don't re-serialize
+
+# Default preferences payload, computed once at import
+DEFAULT_PREF_DUMP = UserPreference().model_dump()
+
+
+# Duplicate concurrent /ask requests attach to the same pending future,
+# so N identical in-flight questions cost one LLM round trip
+_inflight: Dict[str, asyncio.Future] = {}
+
+# LRU cache of successful /ask results (move_to_end on hit, evict oldest
+# on overflow); repeat questions skip the whole agentic pipeline
+ASK_CACHE_MAX_ENTRIES = 512
+_ask_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+# Approximate-key companion to the exact LRU: semantically similar
+# questions ("what is AI?" vs "explain AI") reuse the cached answer.
+# Created at startup once the Gemini client is available.
+_semantic_cache: Optional[SemanticCache] = None
+SEMANTIC_CACHE_METHOD = "API_ASK"
+
+
+def _ask_key(question: str, preferences: Optional[Dict], history: Optional[List[Dict]]) -> str:
+    """Stable digest identifying an /ask request for in-flight coalescing"""
+    payload = json.dumps([question, preferences, history], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode()).hexdigest()
+
+
+# Memory agent singleton plus per-file count caches keyed by mtime, so
+# dashboard polls of /memory and /stats cost a stat() instead of a JSON parse
+memory_agent = MemoryAgent()
+_conv_cache = {}
+_mem_cache = {}
+_doc_cache = {}
+
+# Preferences are persisted so every worker sees updates; reads go
+# through an mtime-based cache like the storage counts above
+PREFS_FILE = os.path.join(memory_agent.storage_dir, "preferences.json")
+_prefs_file_cache = {}
+
+
+def _load_shared_preferences() -> Optional[Dict]:
+    """Preferences dump from the shared file, re-read only when it changes"""
+    try:
+        mtime = os.stat(PREFS_FILE).st_mtime_ns
+    except OSError:
+        return None
+    if _prefs_file_cache.get('mtime') != mtime:
+        try:
+            with open(PREFS_FILE, 'r') as f:
+                _prefs_file_cache['data'] = json.load(f)
+        except Exception:
+            _prefs_file_cache['data'] = None
+        _prefs_file_cache['mtime'] = mtime
+    return _prefs_file_cache['data']
+
+
+def _current_prefs_dump() -> Optional[Dict]:
+    """Active preferences, the shared file being authoritative
+
+    Trusting this worker's in-memory dump first would hide updates that
+    a sibling worker persisted after ours; the file read is an mtime
+    check in the common case. The local dump only backstops a failed
+    persist (file missing/unreadable).
+    """
+    shared = _load_shared_preferences()
+    if shared is not None:
+        return shared
+    return current_user_preferences_dump
+
+
+def _count_items(path: str) -> int:
+    """Count top-level entries in a JSON array file without building it"""
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            return sum(1 for _ in ijson.items(f, 'item'))
+    with open(path, 'r') as f:
+        return len(json.load(f))
+
+
+def _cached_count(path: str, cache: Dict) -> int:
+    """Count of entries in a JSON list file, re-counted only when it changes"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+    if cache.get('mtime') != mtime:
+        try:
+            cache['count'] = _count_items(path)
+        except Exception:
+            cache['count'] = 0
+        cache['mtime'] = mtime
+    return cache['count']
+
+
+def _document_count() -> int:
+    """Document count from writer-maintained state; file fallback otherwise
+
+    Writer paths already learn total_documents from the store tools, so
+    polled endpoints normally return this without touching the filesystem.
+    """
+    counts = getattr(app.state, "counts", None)
+    if counts is not None:
+        return counts["documents"]
+    return _cached_count(
+        os.path.join(memory_agent.storage_dir, "documents.json"), _doc_cache
+    )
+
+
+async def _get_mcp_session() -> ClientSession:
+    """
+    Return the shared MCP session, launching the tool server on first use
+
+    The stdio subprocess and MCP handshake are paid once per server
+    lifetime instead of once per request; the session lives on app.state
+    and is closed by the shutdown handler.
+    """
+    if getattr(app.state, "mcp_session", None) is None:
+        async with app.state.mcp_lock:
+            if getattr(app.state, "mcp_session", None) is None:
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+                server_params = StdioServerParameters(
+                    command=sys.executable,
+                    args=[os.path.join(script_dir, "qa_tools.py")]
+                )
+                stack = AsyncExitStack()
+                read, write = await stack.enter_async_context(stdio_client(server_params))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+                app.state.mcp_stack = stack
+                app.state.mcp_session = session
+    return app.state.mcp_session
 
 @app.get("/")
 async def root():
@@ -94,7 +306,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "qa-agent",
-        "queries_processed": total_queries
+        "queries_processed": total_queries_c.value
     }
 
 @app.post("/preferences")
@@ -108,28 +320,35 @@ async def set_preferences(request: UserPreferenceRequest):
     Returns:
         Confirmation of preferences set
     """
-    global current_user_preferences
-    
+    global current_user_preferences, current_user_preferences_dump
+
     try:
         current_user_preferences = UserPreference(**request.model_dump())
-        
-        console.print(Panel(
-            f"[bold green]✓ User Preferences Updated[/bold green]\n\n"
-            f"Expertise: {current_user_preferences.expertise_level}\n"
-            f"Style: {current_user_preferences.response_style}\n"
-            f"Depth: {current_user_preferences.depth_preference}\n"
-            f"Focus: {', '.join(current_user_preferences.focus_areas) if current_user_preferences.focus_areas else 'General'}",
-            border_style="green"
-        ))
-        
+        current_user_preferences_dump = current_user_preferences.model_dump()
+
+        # Persist so sibling workers pick the update up via mtime
+        try:
+            with open(PREFS_FILE, 'w') as f:
+                json.dump(current_user_preferences_dump, f)
+        except Exception as e:
+            log.warning("could not persist preferences: %s", e)
+
+        log.info(
+            "preferences updated expertise=%s style=%s depth=%s",
+            current_user_preferences.expertise_level,
+            current_user_preferences.response_style,
+            current_user_preferences.depth_preference,
+        )
+
+
         return {
             "success": True,
             "message": "User preferences updated successfully",
-            "preferences": current_user_preferences.model_dump()
+            "preferences": current_user_preferences_dump
         }
         
     except Exception as e:
-        console.print(f"[red]Error setting preferences: {e}[/red]")
+        log.error("error setting preferences: %s", e)
         raise HTTPException(
             status_code=400,
             detail=f"Error setting preferences: {str(e)}"
@@ -143,15 +362,16 @@ async def get_preferences():
     Returns:
         Current user preferences or defaults
     """
-    if current_user_preferences:
+    prefs_dump = _current_prefs_dump()
+    if prefs_dump:
         return {
             "success": True,
-            "preferences": current_user_preferences.model_dump()
+            "preferences": prefs_dump
         }
     else:
         return {
             "success": True,
-            "preferences": UserPreference().model_dump(),
+            "preferences": DEFAULT_PREF_DUMP,
             "message": "Using default preferences"
         }
 
@@ -168,42 +388,108 @@ async def ask_question(request: QuestionRequest):
     Returns:
         Structured answer with reasoning, sources, confidence, and method
     """
-    global total_queries, successful_queries, current_user_preferences, api_key
+    global current_user_preferences
     
     try:
-        console.print(Panel(
-            f"[bold cyan]New Query (Agentic):[/bold cyan] {request.question}",
-            border_style="cyan"
-        ))
-        
-        total_queries += 1
+        log.info("query q=%s", request.question)
+
+        _inc(total_queries_c)
         
         # Use preferences from request or global
-        preferences_dict = request.user_preferences or (
-            current_user_preferences.model_dump() if current_user_preferences else None
-        )
-        
-        # Process query through new agentic architecture
-        result = await process_query_api(
-            query=request.question,
-            api_key=api_key,
-            user_preferences=preferences_dict,
-            conversation_history=request.conversation_history
-        )
+        preferences_dict = request.user_preferences or _current_prefs_dump()
         
+        # Repeat questions are served straight from the LRU cache;
+        # requests carrying conversation history bypass it (context-dependent)
+        key = _ask_key(request.question, preferences_dict, request.conversation_history)
+        cacheable = not request.conversation_history
+        if cacheable and key in _ask_cache:
+            _ask_cache.move_to_end(key)
+            result = _ask_cache[key]
+            log.debug("/ask cache hit")
+            _inc(successful_queries_c)
+            return ORJSONResponse({
+                "success": True,
+                "answer": result.get('answer', 'No answer generated'),
+                "confidence": result.get('confidence', 0),
+                "sources": result.get('sources', []),
+                "method": result.get('method', 'UNKNOWN'),
+                "reasoning_flow": result.get('reasoning_flow', {}),
+                "user_preferences_applied": result.get('user_preferences_applied', False),
+                "architecture": "Perception → Memory → Decision ↔ Action"
+            })
+
+        # Approximate match: semantically similar past questions count too
+        if cacheable and _semantic_cache is not None:
+            hit = await asyncio.to_thread(
+                _semantic_cache.lookup, request.question, SEMANTIC_CACHE_METHOD, preferences_dict
+            )
+            if hit is not None:
+                answer, sources, confidence = hit
+                _inc(successful_queries_c)
+                return ORJSONResponse({
+                    "success": True,
+                    "answer": answer,
+                    "confidence": confidence,
+                    "sources": sources,
+                    "method": "SEMANTIC_CACHE",
+                    "reasoning_flow": {"cache": ["Answer reused from semantic cache"]},
+                    "user_preferences_applied": preferences_dict is not None,
+                    "architecture": "Perception → Memory → Decision ↔ Action"
+                })
+
+        # Coalesce duplicate in-flight queries onto one upstream call
+        pending = _inflight.get(key)
+        if pending is not None:
+            log.debug("duplicate in-flight query, awaiting shared result")
+            result = await asyncio.shield(pending)
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            _inflight[key] = fut
+            try:
+                # Process query through new agentic architecture
+                result = await process_query_api(
+                    query=request.question,
+                    api_key=API_KEY,
+                    user_preferences=preferences_dict,
+                    conversation_history=request.conversation_history
+                )
+                fut.set_result(result)
+            except BaseException as e:
+                fut.set_exception(e)
+                # Nobody may be awaiting the future; don't warn on teardown
+                fut.exception()
+                raise
+            finally:
+                _inflight.pop(key, None)
+
         if result.get('confidence', 0) > 0:
-            successful_queries += 1
-        
-        console.print(Panel(
-            f"[green]✓ Query processed via AGENTIC ARCHITECTURE[/green]\n"
-            f"Confidence: {result.get('confidence', 0)}%\n"
-            f"Method: {result.get('method', 'UNKNOWN')}\n"
-            f"Stages: Perception → Memory → Decision ↔ Action\n"
-            f"Preferences Applied: {result.get('user_preferences_applied', False)}",
-            border_style="green"
-        ))
-        
-        return {
+            _inc(successful_queries_c)
+            # Only successful, context-free results are worth replaying
+            if cacheable:
+                _ask_cache[key] = result
+                _ask_cache.move_to_end(key)
+                if len(_ask_cache) > ASK_CACHE_MAX_ENTRIES:
+                    _ask_cache.popitem(last=False)
+                if _semantic_cache is not None:
+                    await asyncio.to_thread(
+                        _semantic_cache.store,
+                        request.question,
+                        SEMANTIC_CACHE_METHOD,
+                        preferences_dict,
+                        result.get('answer', ''),
+                        result.get('sources', []),
+                        result.get('confidence', 0)
+                    )
+
+        log.info(
+            "query done confidence=%s method=%s",
+            result.get('confidence', 0), result.get('method', 'UNKNOWN')
+        )
+
+
+        # Explicit ORJSONResponse skips the jsonable_encoder pass over the
+        # (potentially large) reasoning_flow payload
+        return ORJSONResponse({
             "success": True,
             "answer": result.get('answer', 'No answer generated'),
             "confidence": result.get('confidence', 0),
@@ -212,84 +498,192 @@ async def ask_question(request: QuestionRequest):
             "reasoning_flow": result.get('reasoning_flow', {}),
             "user_preferences_applied": result.get('user_preferences_applied', False),
             "architecture": "Perception → Memory → Decision ↔ Action"
-        }
+        })
         
     except Exception as e:
-        console.print(f"[red]Error processing question: {e}[/red]")
-        import traceback
-        traceback.print_exc()
+        log.exception("error processing question: %s", e)
         
         raise HTTPException(
             status_code=500,
             detail=f"Error processing question: {str(e)}"
         )
 
-@app.post("/store")
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Streaming variant of /ask - emits pipeline events over SSE
+
+    Each event is a JSON object: stage markers for perception/memory/
+    decision/action, answer chunks, then a final "complete" event.
+    Clients that only need the buffered answer should keep using /ask.
+    """
+    global current_user_preferences
+
+    _inc(total_queries_c)
+
+    preferences_dict = request.user_preferences or _current_prefs_dump()
+
+    async def sse_generator():
+        async for event in process_query_api_stream(
+            query=request.question,
+            api_key=API_KEY,
+            user_preferences=preferences_dict,
+            conversation_history=request.conversation_history
+        ):
+            if event.get("stage") == "complete" and event.get("confidence", 0) > 0:
+                _inc(successful_queries_c)
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(sse_generator(), media_type="text/event-stream")
+
+# Bounded queue for fire-and-forget /store; a full queue sheds load
+# with 503 instead of buffering unboundedly
+STORE_QUEUE_MAX = 1024
+STORE_WORKERS = 2
+
+
+def _update_document_count(data: Dict):
+    """Keep the writer-maintained document count current from a store result"""
+    counts = getattr(app.state, "counts", None)
+    if counts is not None and "total_documents" in data:
+        counts["documents"] = data["total_documents"]
+
+
+async def _store_worker():
+    """Drain queued /store payloads through the shared MCP session"""
+    while True:
+        item = await app.state.store_queue.get()
+        try:
+            session = await _get_mcp_session()
+            result = await session.call_tool("store_document", arguments=item)
+            data = _json_loads(result.content[0].text)
+            _update_document_count(data)
+            log.debug("stored '%s' in background", item.get('title'))
+        except Exception as e:
+            log.error("error storing queued content: %s", e)
+        finally:
+            app.state.store_queue.task_done()
+
+
+@app.post("/store", status_code=202)
 async def store_content(request: PageContentRequest):
     """
-    Store webpage content in the document store (uses MCP tools directly)
-    
-    Args:
-        request: PageContentRequest with page details
-        
-    Returns:
-        Success status and document count
+    Queue webpage content for background storage (fire-and-forget)
+
+    The extension doesn't need the document count synchronously, so the
+    endpoint acknowledges receipt immediately and background workers do
+    the MCP round trip. Returns 503 when the queue is full.
     """
+    log.info("queueing content title=%s chars=%d", request.title, len(request.content))
+
     try:
-        console.print(Panel(
-            f"[bold cyan]Storing Content:[/bold cyan]\n"
-            f"Title: {request.title}\n"
-            f"URL: {request.url}\n"
-            f"Length: {len(request.content)} chars",
-            border_style="cyan"
-        ))
-        
-        # Use MCP tools directly for storage
-        from mcp import ClientSession, StdioServerParameters
-        from mcp.client.stdio import stdio_client
-        import sys
-        
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        qa_tools_path = os.path.join(script_dir, "qa_tools.py")
-        
-        server_params = StdioServerParameters(
-            command=sys.executable,
-            args=[qa_tools_path]
+        app.state.store_queue.put_nowait({
+            "title": request.title,
+            "content": request.content,
+            "url": request.url,
+            "metadata": {"type": "webpage"}
+        })
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Store queue is full, retry later"
         )
-        
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                result = await session.call_tool("store_document", arguments={
-                    "title": request.title,
-                    "content": request.content,
-                    "url": request.url,
+
+    return {
+        "success": True,
+        "queued": True,
+        "message": f"Queued '{request.title}' for storage"
+    }
+
+@app.post("/store/batch")
+async def store_batch(request: BatchPageContentRequest):
+    """
+    Store many captured pages with a single MCP call
+
+    One store_documents round trip (and one disk write on the tool side)
+    amortizes serialization and handshake cost across the whole batch.
+    """
+    try:
+        session = await _get_mcp_session()
+
+        result = await session.call_tool("store_documents", arguments={
+            "documents": [
+                {
+                    "title": item.title,
+                    "content": item.content,
+                    "url": item.url,
                     "metadata": {"type": "webpage"}
-                })
-                
-                import json
-                data = json.loads(result.content[0].text)
-                
-                console.print(Panel(
-                    f"[green]✓ Content stored successfully[/green]\n"
-                    f"Total documents: {data.get('total_documents', 0)}",
-                    border_style="green"
-                ))
-                
-                return {
-                    "success": data.get('success', True),
-                    "message": f"Stored '{request.title}' successfully",
-                    "total_documents": data.get('total_documents', 0)
                 }
-        
+                for item in request.items
+            ]
+        })
+
+        data = _json_loads(result.content[0].text)
+        _update_document_count(data)
+
+        return {
+            "success": data.get('success', True),
+            "stored": data.get('stored', len(request.items)),
+            "total_documents": data.get('total_documents', 0)
+        }
+
     except Exception as e:
-        console.print(f"[red]Error storing content: {e}[/red]")
+        log.error("error storing batch: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error storing batch: {str(e)}"
+        )
+
+@app.post("/store/sync")
+async def store_content_sync(request: PageContentRequest):
+    """
+    Store webpage content synchronously (old /store behavior)
+
+    Returns:
+        Success status and document count
+    """
+    try:
+        # Use the shared MCP session - no per-request subprocess spawn
+        session = await _get_mcp_session()
+
+        result = await session.call_tool("store_document", arguments={
+            "title": request.title,
+            "content": request.content,
+            "url": request.url,
+            "metadata": {"type": "webpage"}
+        })
+
+        data = _json_loads(result.content[0].text)
+        _update_document_count(data)
+
+        log.info("content stored total_documents=%s", data.get('total_documents', 0))
+
+        return {
+            "success": data.get('success', True),
+            "message": f"Stored '{request.title}' successfully",
+            "total_documents": data.get('total_documents', 0)
+        }
+
+    except Exception as e:
+        log.error("error storing content: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error storing content: {str(e)}"
         )
 
+@app.post("/cache/clear")
+async def clear_ask_cache():
+    """
+    Clear the /ask response cache (e.g. after storing new documents)
+
+    Returns:
+        Number of entries dropped
+    """
+    dropped = len(_ask_cache)
+    _ask_cache.clear()
+    log.info("/ask cache cleared entries=%d", dropped)
+    return {"success": True, "entries_cleared": dropped}
+
 @app.get("/memory")
 async def get_memory():
     """
@@ -299,33 +693,14 @@ async def get_memory():
         Memory count, conversation count, and summary
     """
     try:
-        memory_agent = MemoryAgent()
-        
-        # Load conversation history
-        import json
-        conv_file = os.path.join(memory_agent.storage_dir, "conversation_history.json")
-        conv_count = 0
-        if os.path.exists(conv_file):
-            with open(conv_file, 'r') as f:
-                conversations = json.load(f)
-                conv_count = len(conversations)
-        
-        # Load memories
-        mem_file = os.path.join(memory_agent.storage_dir, "memory.json")
-        mem_count = 0
-        if os.path.exists(mem_file):
-            with open(mem_file, 'r') as f:
-                memories = json.load(f)
-                mem_count = len(memories)
-        
-        # Load documents
-        doc_file = os.path.join(memory_agent.storage_dir, "documents.json")
-        doc_count = 0
-        if os.path.exists(doc_file):
-            with open(doc_file, 'r') as f:
-                documents = json.load(f)
-                doc_count = len(documents)
-        
+        conv_count = _cached_count(
+            os.path.join(memory_agent.storage_dir, "conversation_history.json"), _conv_cache
+        )
+        mem_count = _cached_count(
+            os.path.join(memory_agent.storage_dir, "memory.json"), _mem_cache
+        )
+        doc_count = _document_count()
+
         return {
             "success": True,
             "conversations": conv_count,
@@ -335,7 +710,7 @@ async def get_memory():
         }
         
     except Exception as e:
-        console.print(f"[red]Error retrieving memory: {e}[/red]")
+        log.error("error retrieving memory: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving memory: {str(e)}"
@@ -350,27 +725,20 @@ async def get_statistics():
         Statistics about queries, documents, accuracy, and architecture info
     """
     try:
-        memory_agent = MemoryAgent()
-        
-        # Load document count
-        import json
-        doc_file = os.path.join(memory_agent.storage_dir, "documents.json")
-        doc_count = 0
-        if os.path.exists(doc_file):
-            with open(doc_file, 'r') as f:
-                documents = json.load(f)
-                doc_count = len(documents)
-        
+        doc_count = _document_count()
+
         # Calculate accuracy
         accuracy = 100
-        if total_queries > 0:
-            accuracy = int((successful_queries / total_queries) * 100)
+        questions = total_queries_c.value
+        successful = successful_queries_c.value
+        if questions > 0:
+            accuracy = int((successful / questions) * 100)
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "architecture": "Perception → Memory → Decision ↔ Action",
-            "questions": total_queries,
-            "successful_queries": successful_queries,
+            "questions": questions,
+            "successful_queries": successful,
             "documents": doc_count,
             "accuracy": accuracy,
             "has_user_preferences": current_user_preferences is not None,
@@ -380,14 +748,14 @@ async def get_statistics():
                 "Multi-stage decision making",
                 "MCP tool integration"
             ]
-        }
-        
+        })
+
     except Exception as e:
-        console.print(f"[red]Error retrieving stats: {e}[/red]")
+        log.error("error retrieving stats: %s", e)
         return {
             "success": True,
-            "questions": total_queries,
-            "successful_queries": successful_queries,
+            "questions": total_queries_c.value,
+            "successful_queries": successful_queries_c.value,
             "documents": 0,
             "accuracy": 100
         }
@@ -395,45 +763,95 @@ async def get_statistics():
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
-    global api_key
-    
-    # Load API key
-    from dotenv import load_dotenv
-    load_dotenv()
-    api_key = os.getenv("GEMINI_API_KEY", "")
-    
-    if not api_key:
-        console.print("[red]❌ WARNING: GEMINI_API_KEY not found in environment![/red]")
-    
-    console.print(Panel(
-        "[bold green]🚀 QA Agent API Server Started - AGENTIC ARCHITECTURE[/bold green]\n\n"
-        "[magenta]Architecture:[/magenta]\n"
-        "  Perception → Memory → Decision ↔ Action\n\n"
-        "[cyan]Endpoints:[/cyan]\n"
-        "• POST http://localhost:8000/ask - Ask questions (with preferences)\n"
-        "• POST http://localhost:8000/preferences - Set user preferences\n"
-        "• GET  http://localhost:8000/preferences - Get preferences\n"
-        "• POST http://localhost:8000/store - Store content\n"
-        "• GET  http://localhost:8000/memory - View memory\n"
-        "• GET  http://localhost:8000/stats - View statistics\n"
-        "• GET  http://localhost:8000/health - Health check\n\n"
-        "[yellow]✨ Features: User Preferences, CoT Reasoning, MCP Tools, RAG[/yellow]\n"
-        "[yellow]Ready to receive requests from Chrome extension![/yellow]",
-        title="QA Agent API v2.0 - Agentic",
-        border_style="green"
-    ))
+    # Attach handlers for the hot-path tool loggers (action.py etc.)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if not API_KEY:
+        log.warning("GEMINI_API_KEY not found in environment!")
+
+    # One shared executor for every to_thread/run_in_executor offload.
+    # The offloaded work is network-bound LLM calls, so size it to the
+    # provider's concurrent-request quota rather than CPU count.
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=int(os.getenv("QA_LLM_WORKERS", "16")),
+        thread_name_prefix="qa-llm",
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    app.state.executor = executor
+
+    # Semantic /ask cache needs a Gemini client for embeddings
+    global _semantic_cache
+    if API_KEY:
+        try:
+            from google import genai
+            # Same shared instance the per-request ActionAgents use -
+            # they all persist to storage/semantic_cache.json
+            _semantic_cache = get_semantic_cache(genai.Client(api_key=API_KEY))
+        except Exception as e:
+            log.warning("semantic cache unavailable: %s", e)
+
+    # Warm up the shared MCP session so the first /store doesn't pay
+    # the subprocess + handshake cost
+    app.state.mcp_lock = asyncio.Lock()
+    app.state.mcp_session = None
+    app.state.mcp_stack = None
+    try:
+        await _get_mcp_session()
+        log.info("MCP tool server ready (persistent session)")
+    except Exception as e:
+        log.warning("MCP warm-up failed, will retry on first use: %s", e)
+        app.state.mcp_session = None
+
+    # Seed writer-maintained counts with a one-time file scan; store
+    # paths keep them current so polls never re-read the files
+    app.state.counts = {
+        "documents": _cached_count(
+            os.path.join(memory_agent.storage_dir, "documents.json"), _doc_cache
+        )
+    }
+
+    # Background workers drain the fire-and-forget /store queue
+    app.state.store_queue = asyncio.Queue(maxsize=STORE_QUEUE_MAX)
+    app.state.store_workers = [
+        asyncio.create_task(_store_worker()) for _ in range(STORE_WORKERS)
+    ]
+
+    # Plain log line: this handler runs once per worker, so a rich panel
+    # here would be rendered N times under multi-worker deployments
+    log.info("QA Agent API server started (agentic architecture)")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
-    console.print(Panel(
-        f"[bold yellow]Shutting down...[/bold yellow]\n\n"
-        f"Total queries processed: {total_queries}\n"
-        f"Successful queries: {successful_queries}\n"
-        f"Success rate: {(successful_queries/max(total_queries, 1))*100:.1f}%",
-        title="Shutdown Summary",
-        border_style="yellow"
-    ))
+    # Flush queued stores, then stop the workers
+    queue = getattr(app.state, "store_queue", None)
+    if queue is not None:
+        try:
+            await asyncio.wait_for(queue.join(), timeout=10.0)
+        except asyncio.TimeoutError:
+            log.warning("timed out flushing store queue")
+        for worker in getattr(app.state, "store_workers", []):
+            worker.cancel()
+
+    stack = getattr(app.state, "mcp_stack", None)
+    if stack is not None:
+        try:
+            await stack.aclose()
+        except Exception:
+            pass
+        app.state.mcp_session = None
+        app.state.mcp_stack = None
+
+    executor = getattr(app.state, "executor", None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    log.info(
+        "shutting down: %d queries, %d successful (%.1f%%)",
+        total_queries_c.value,
+        successful_queries_c.value,
+        (successful_queries_c.value / max(total_queries_c.value, 1)) * 100,
+    )
 
 def main():
     """Main entry point"""
@@ -442,6 +860,14 @@ def main():
         "[magenta]Architecture:[/magenta] Perception → Memory → Decision ↔ Action\n\n"
         "Make sure your Chrome extension is configured to use:\n"
         "[green]http://localhost:8000[/green]\n\n"
+        "[cyan]Endpoints:[/cyan]\n"
+        "• POST /ask - Ask questions (with preferences)\n"
+        "• POST /preferences - Set user preferences\n"
+        "• GET  /preferences - Get preferences\n"
+        "• POST /store - Store content\n"
+        "• GET  /memory - View memory\n"
+        "• GET  /stats - View statistics\n"
+        "• GET  /health - Health check\n\n"
         "[yellow]New in v2.0:[/yellow]\n"
         "• User preference personalization\n"
         "• Chain-of-Thought reasoning at every stage\n"
@@ -450,11 +876,20 @@ def main():
         border_style="cyan"
     ))
     
+    # uvloop + httptools replace the pure-Python event loop and h11 parser.
+    # Workers default to 1 because the in-process caches and query counters
+    # are per-worker state; for multi-core deployments set UVICORN_WORKERS
+    # (the usual heuristic is 2*cpu_count + 1) and move counters to a
+    # shared store first.
     uvicorn.run(
-        app,
+        "api_server:app",
         host="0.0.0.0",
         port=8000,
-        log_level="info"
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+        log_level=os.getenv("LOG_LEVEL", "warning"),
+        access_log=False
     )
 
 if __name__ == "__main__":
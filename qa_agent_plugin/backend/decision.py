@@ -3,24 +3,75 @@ Decision Module - Decides which tool to call based on perception and memory
 Uses LLM-based reasoning to determine optimal tool sequence
 """
 import os
+import asyncio
+import logging
+import hashlib
+import re
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional, Any
-from pydantic import BaseModel, Field
-from google import genai
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from google.genai import types
 from rich.console import Console
 import json
+from llm_client import get_client
+from _log import logger as log
+from string import Template
+
+# orjson's C parser for decoding model replies; stdlib fallback
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# Incremental JSON parsing for streaming tool-call dispatch
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 console = Console()
 
+# Single-scan extraction of a fenced JSON payload; fence-less replies
+# fall through to a plain strip
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\})\s*```", re.DOTALL)
+
+# Provider-side context cache for the static decision prefix (tool
+# catalog, process, patterns, rules). Module scope: the API path builds
+# a fresh DecisionAgent per request, so instance attributes would
+# re-attempt the billable create on every request
+_prefix_cache_name: Optional[str] = None
+_prefix_cache_tried = False
+_prefix_cache_lock = threading.Lock()
+
+# LRU of prior DecisionOutputs keyed by the context signature -
+# module scope for the same per-request-instance reason
+_decision_cache: "OrderedDict[str, DecisionOutput]" = OrderedDict()
+DECISION_CACHE_MAX_ENTRIES = 512
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
 
 class ToolDescription(BaseModel):
-    """Description of an available MCP tool"""
+    """Description of an available MCP tool
+
+    Frozen: the catalog never changes after construction, which lets
+    rendered views of it be computed once and trusted thereafter.
+    """
+    model_config = ConfigDict(frozen=True)
+
     name: str
     description: str
     parameters: Dict[str, str]
     when_to_use: str
+
+    @property
+    def params_str(self) -> str:
+        """Pre-joined k=v rendering of the parameters dict"""
+        return ', '.join(f'{k}={v}' for k, v in self.parameters.items())
     
 
 class DecisionInput(BaseModel):
@@ -31,7 +82,14 @@ class DecisionInput(BaseModel):
     
 
 class ToolCall(BaseModel):
-    """A single tool call decision"""
+    """A single tool call decision
+
+    Frozen + extra='ignore': these value objects are allocated per
+    request, so skip unknown-field bookkeeping and make instances
+    safely shareable from the decision cache.
+    """
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     tool_name: str
     arguments: Dict[str, Any]
     reasoning: str = Field(..., description="Why this tool was chosen")
@@ -40,16 +98,10 @@ class ToolCall(BaseModel):
 
 class DecisionOutput(BaseModel):
     """Output from decision module"""
-    should_call_tool: bool = Field(..., description="Whether to call a tool")
-    tool_calls: List[ToolCall] = Field(default_factory=list, description="Ordered list of tools to call")
-    reasoning_steps: List[str] = Field(..., description="Step-by-step decision reasoning")
-    confidence: float = Field(..., ge=0, le=100, description="Confidence in decisions")
-    needs_more_data: bool = Field(default=False, description="Whether more data is needed after these tools")
-    final_answer_ready: bool = Field(default=False, description="Whether we can generate final answer after these tools")
-    user_preferences: Optional[Dict] = Field(None, description="User preferences to maintain")
-    
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        extra='ignore',
+        json_schema_extra={
             "example": {
                 "should_call_tool": True,
                 "tool_calls": [
@@ -66,6 +118,162 @@ class DecisionOutput(BaseModel):
                 "final_answer_ready": True
             }
         }
+    )
+
+    should_call_tool: bool = Field(..., description="Whether to call a tool")
+    tool_calls: List[ToolCall] = Field(default_factory=list, description="Ordered list of tools to call")
+    reasoning_steps: List[str] = Field(..., description="Step-by-step decision reasoning")
+    confidence: float = Field(..., ge=0, le=100, description="Confidence in decisions")
+    needs_more_data: bool = Field(default=False, description="Whether more data is needed after these tools")
+    final_answer_ready: bool = Field(default=False, description="Whether we can generate final answer after these tools")
+    user_preferences: Optional[Dict] = Field(None, description="User preferences to maintain")
+
+
+class LLMToolCall(BaseModel):
+    """Tool call shape handed to Gemini for constrained decoding
+
+    Arguments travel as a JSON object string because the structured-output
+    API rejects open-ended object fields (no fixed properties).
+    """
+    model_config = ConfigDict(extra='ignore')
+
+    tool_name: str = "unknown"
+    arguments_json: str = Field(default="{}", description="Tool arguments as a JSON object string")
+    reasoning: str = "No reasoning provided"
+    priority: int = 1
+
+    @model_validator(mode='before')
+    @classmethod
+    def _accept_inline_arguments(cls, data):
+        """Fold a plain 'arguments' object (non-structured replies) into
+        arguments_json so both shapes validate identically"""
+        if isinstance(data, dict) and "arguments" in data and "arguments_json" not in data:
+            data = dict(data)
+            data["arguments_json"] = json.dumps(data.pop("arguments"))
+        return data
+
+    def decoded_arguments(self) -> Dict[str, Any]:
+        """The arguments_json payload as a dict (empty on bad JSON)"""
+        try:
+            arguments = _json_loads(self.arguments_json) if self.arguments_json else {}
+        except ValueError:
+            return {}
+        return arguments if isinstance(arguments, dict) else {}
+
+
+class DecisionLLMResponse(BaseModel):
+    """Response schema for Gemini's constrained JSON decoding"""
+    model_config = ConfigDict(extra='ignore')
+
+    should_call_tool: bool = False
+    tool_calls: List[LLMToolCall] = Field(default_factory=list)
+    reasoning_steps: List[str] = Field(default_factory=list)
+    confidence: float = 70.0
+    needs_more_data: bool = False
+    final_answer_ready: bool = True
+
+
+# Static decision-prompt prefix (role, process, patterns, output format,
+# critical rules); rendered once per agent with the tool catalog.
+#
+# Ordering invariant: everything dynamic (preferences, context, previous
+# actions) lives in _dynamic_suffix and is appended AFTER this block.
+# Provider prompt caches key on exact prefix match, so a single dynamic
+# byte up front would invalidate the cached prefill for the whole prompt.
+_STATIC_PREFIX_TEMPLATE = Template("""You are the DECISION module of an intelligent QA Agent system.
+
+**YOUR ROLE:** Decide which tools to call to best answer the user's query.
+
+**AVAILABLE MCP TOOLS:**
+$tools_desc
+
+**DECISION-MAKING PROCESS (Think step-by-step):**
+
+Step 1: [GOAL_ANALYSIS] What is the end goal?
+   - Understand what the user ultimately wants
+   - Consider their preferences and expertise level
+
+Step 2: [CONTEXT_ASSESSMENT] What do we already have?
+   - Review available documents, memories, conversations
+   - Identify gaps in information
+
+Step 3: [METHOD_SELECTION] Which approach is best?
+   - RAG: If we have sufficient relevant documents
+   - LIVE_SEARCH: If query needs current/real-time data
+   - GEMINI_KNOWLEDGE: If it's general knowledge
+   - Consider user's time sensitivity and preferred sources
+
+Step 4: [TOOL_SEQUENCE] What tools do we need?
+   - List tools in execution order
+   - Explain why each tool is necessary
+   - Consider dependencies between tools
+   - Tools sharing a priority run IN PARALLEL; give independent tools
+     the same priority and reserve higher numbers for dependent steps
+
+Step 5: [PREFERENCE_ALIGNMENT] Do choices match user preferences?
+   - Verify tool selection aligns with user's expertise level
+   - Ensure response depth matches preference
+   - Check if sources align with preferences
+
+Step 6: [DECISION_VERIFICATION] Is this the optimal plan?
+   - Self-check: Will these tools get us the answer?
+   - Self-check: Are we calling unnecessary tools?
+   - Self-check: Are we considering user preferences?
+
+**COMMON PATTERNS:**
+
+Pattern A: RAG Answer (we have documents)
+1. retrieve_documents → Get relevant docs
+2. generate_response → Create answer from docs
+3. verify_answer → Check quality
+
+Pattern B: Live Search (need current data)
+1. Skip tools, let Action module use Google Search Grounding
+2. verify_answer → Check quality after
+
+Pattern C: General Knowledge (no docs, no live data needed)
+1. Skip retrieval tools
+2. generate_response → Use Gemini knowledge
+3. verify_answer → Check quality
+
+Pattern D: Store Content (user wants to save something)
+1. store_document → Save the content
+2. get_statistics → Show updated stats
+
+**OUTPUT FORMAT (MANDATORY JSON):**
+{
+  "should_call_tool": true/false,
+  "tool_calls": [
+    {
+      "tool_name": "tool_name_here",
+      "arguments_json": "{\\"param1\\": \\"value1\\", \\"param2\\": \\"value2\\"}",
+      "reasoning": "Why this tool is needed",
+      "priority": 1
+    }
+  ],
+  "reasoning_steps": [
+    "[GOAL_ANALYSIS] explanation",
+    "[CONTEXT_ASSESSMENT] explanation",
+    "[METHOD_SELECTION] explanation",
+    "[TOOL_SEQUENCE] explanation",
+    "[PREFERENCE_ALIGNMENT] explanation",
+    "[DECISION_VERIFICATION] explanation"
+  ],
+  "confidence": 85,
+  "needs_more_data": false,
+  "final_answer_ready": true
+}
+
+**CRITICAL RULES:**
+1. ALWAYS include reasoning_type tags in reasoning_steps
+2. ALWAYS consider user preferences in your decisions
+3. If has_sufficient_context=true and relevant_documents>0, prefer RAG pattern
+4. If requires_live_data=true, prefer live search pattern
+5. Don't call tools unnecessarily - be efficient
+6. Order matters - analyze before retrieve, retrieve before generate
+7. Use IDENTICAL priority values for tools that don't depend on each
+   other - they will be executed concurrently
+8. NEVER output anything except valid JSON""")
 
 
 # ============================================================================
@@ -80,10 +288,10 @@ class DecisionAgent:
     
     def __init__(self, api_key: str):
         """Initialize decision agent with API key"""
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client(api_key)
         
-        # Define available MCP tools
-        self.available_tools = [
+        # Define available MCP tools (immutable catalog)
+        self.available_tools = (
             ToolDescription(
                 name="analyze_query",
                 description="Analyze query to extract intent, keywords, and metadata",
@@ -132,11 +340,71 @@ class DecisionAgent:
                 parameters={},
                 when_to_use="When user asks about system performance or usage stats"
             )
-        ]
-    
-    def _build_decision_prompt(self, memory_output: Any, previous_actions: List[Dict]) -> str:
-        """Build prompt for decision-making"""
-        
+        )
+
+        # Tool catalog text and the full static prefix never change after
+        # construction, so render them once instead of per decision
+        self._tools_desc = "\n".join([
+            f"{i+1}. **{tool.name}**\n"
+            f"   Description: {tool.description}\n"
+            f"   Parameters: {tool.params_str}\n"
+            f"   When to use: {tool.when_to_use}\n"
+            for i, tool in enumerate(self.available_tools)
+        ])
+        self._static_prefix_text = _STATIC_PREFIX_TEMPLATE.substitute(tools_desc=self._tools_desc)
+        # Prefix + separator pre-joined for the inline (cache-miss) path,
+        # so per-call assembly is a single concat with the suffix
+        self._inline_prefix = self._static_prefix_text + "\n\n"
+
+    def _decision_cache_key(self, memory_output: Any) -> str:
+        """Signature of the decision-relevant context fields"""
+        # MemoryOutput sorts and hashes its keywords once; fall back to
+        # sorting here for plain stand-ins without the cached property
+        keywords_hash = getattr(memory_output, "keywords_hash", None)
+        if keywords_hash is None:
+            keywords_hash = hash(tuple(sorted(memory_output.extracted_keywords)))
+        payload = (
+            f"{memory_output.query_type}|{memory_output.suggested_method}|"
+            f"{memory_output.has_sufficient_context}|"
+            f"{keywords_hash}|"
+            f"{memory_output.requires_live_data}"
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _cached_decision(self, memory_output: Any, previous_actions: List[Dict]) -> Optional[DecisionOutput]:
+        """
+        Cached DecisionOutput for an equivalent context, if any
+
+        Bypassed mid-session (previous_actions non-empty) since follow-up
+        decisions depend on what already ran.
+        """
+        if previous_actions:
+            return None
+        key = self._decision_cache_key(memory_output)
+        cached = _decision_cache.get(key)
+        if cached is None:
+            return None
+        _decision_cache.move_to_end(key)
+        log.debug("decision reused from cache (no LLM call)")
+        return cached.model_copy(update={"user_preferences": memory_output.user_preferences})
+
+    def _store_decision(self, memory_output: Any, previous_actions: List[Dict], output: DecisionOutput) -> None:
+        """Insert a fresh decision into the LRU (only clean, initial ones)"""
+        if previous_actions or output.confidence <= 0:
+            return
+        key = self._decision_cache_key(memory_output)
+        _decision_cache[key] = output
+        _decision_cache.move_to_end(key)
+        if len(_decision_cache) > DECISION_CACHE_MAX_ENTRIES:
+            _decision_cache.popitem(last=False)
+
+    def _static_prefix(self) -> str:
+        """Static portion of the decision prompt - rendered once at init"""
+        return self._static_prefix_text
+
+    def _dynamic_suffix(self, memory_output: Any, previous_actions: List[Dict]) -> str:
+        """Per-request portion of the decision prompt (prefs + context)"""
+
         # Extract user preferences
         user_prefs_text = ""
         if memory_output.user_preferences:
@@ -152,29 +420,18 @@ class DecisionAgent:
 
 IMPORTANT: Ensure your tool choices align with user preferences!
 """
-        
-        # Build available tools description
-        tools_desc = "\n".join([
-            f"{i+1}. **{tool.name}**\n"
-            f"   Description: {tool.description}\n"
-            f"   Parameters: {', '.join([f'{k}={v}' for k, v in tool.parameters.items()])}\n"
-            f"   When to use: {tool.when_to_use}\n"
-            for i, tool in enumerate(self.available_tools)
-        ])
-        
-        # Build previous actions summary
+
+        # Build previous actions summary (list + join, not += in a loop)
         prev_actions_text = ""
         if previous_actions:
-            prev_actions_text = "\n**PREVIOUS ACTIONS IN THIS SESSION:**\n"
-            for i, action in enumerate(previous_actions, 1):
-                prev_actions_text += f"{i}. Called {action.get('tool_name', 'unknown')} - {action.get('result_summary', 'completed')}\n"
+            parts = ["\n**PREVIOUS ACTIONS IN THIS SESSION:**"]
+            parts.extend(
+                f"{i}. Called {action.get('tool_name', 'unknown')} - {action.get('result_summary', 'completed')}"
+                for i, action in enumerate(previous_actions, 1)
+            )
+            prev_actions_text = "\n".join(parts)
         
-        return f"""You are the DECISION module of an intelligent QA Agent system.
-
-{user_prefs_text}
-
-**YOUR ROLE:** Decide which tools to call to best answer the user's query.
-
+        return f"""{user_prefs_text}
 **CONTEXT:**
 - Query: {memory_output.original_query}
 - Intent: {memory_output.analyzed_intent}
@@ -189,97 +446,204 @@ IMPORTANT: Ensure your tool choices align with user preferences!
 
 {prev_actions_text}
 
-**AVAILABLE MCP TOOLS:**
-{tools_desc}
-
-**DECISION-MAKING PROCESS (Think step-by-step):**
+Now decide which tools to call:"""
 
-Step 1: [GOAL_ANALYSIS] What is the end goal?
-   - Understand what the user ultimately wants
-   - Consider their preferences and expertise level
+    def _try_deterministic_decision(self, memory_output: Any, previous_actions: List[Dict]) -> Optional[DecisionOutput]:
+        """
+        Rule-based decision for patterns that don't need an LLM
 
-Step 2: [CONTEXT_ASSESSMENT] What do we already have?
-   - Review available documents, memories, conversations
-   - Identify gaps in information
+        Patterns B, C and the RAG variant of A are fully determined by
+        the memory signals, so a plain Python branch returns in
+        microseconds instead of a Gemini round trip. Returns None when
+        no rule applies (or mid-session), deferring to the model.
+        """
+        if previous_actions:
+            return None
 
-Step 3: [METHOD_SELECTION] Which approach is best?
-   - RAG: If we have sufficient relevant documents
-   - LIVE_SEARCH: If query needs current/real-time data
-   - GEMINI_KNOWLEDGE: If it's general knowledge
-   - Consider user's time sensitivity and preferred sources
+        if memory_output.requires_live_data:
+            # Pattern B: Action module handles live search directly
+            return DecisionOutput(
+                should_call_tool=False,
+                tool_calls=[],
+                reasoning_steps=[
+                    "[RULE] requires_live_data=true - live search pattern",
+                    "[RULE] Action module will use Google Search Grounding"
+                ],
+                confidence=88.0,
+                needs_more_data=False,
+                final_answer_ready=True,
+                user_preferences=memory_output.user_preferences
+            )
 
-Step 4: [TOOL_SEQUENCE] What tools do we need?
-   - List tools in execution order
-   - Explain why each tool is necessary
-   - Consider dependencies between tools
+        if (memory_output.suggested_method == "RAG"
+                and memory_output.has_sufficient_context
+                and len(memory_output.relevant_documents) > 0):
+            # Pattern A: retrieve, then verify the generated answer
+            return DecisionOutput(
+                should_call_tool=True,
+                tool_calls=[
+                    ToolCall(
+                        tool_name="retrieve_documents",
+                        arguments={
+                            "keywords": memory_output.extracted_keywords,
+                            "limit": 5
+                        },
+                        reasoning="[RULE] Sufficient stored context - RAG pattern",
+                        priority=1
+                    ),
+                    ToolCall(
+                        tool_name="verify_answer",
+                        arguments={
+                            "answer": "to_be_generated",
+                            "sources": []
+                        },
+                        reasoning="[RULE] Verify answer quality",
+                        priority=2
+                    )
+                ],
+                reasoning_steps=[
+                    "[RULE] has_sufficient_context with stored documents - RAG pattern"
+                ],
+                confidence=88.0,
+                needs_more_data=False,
+                final_answer_ready=True,
+                user_preferences=memory_output.user_preferences
+            )
 
-Step 5: [PREFERENCE_ALIGNMENT] Do choices match user preferences?
-   - Verify tool selection aligns with user's expertise level
-   - Ensure response depth matches preference
-   - Check if sources align with preferences
+        if memory_output.suggested_method == "GEMINI_KNOWLEDGE":
+            # Pattern C: answer straight from model knowledge
+            return DecisionOutput(
+                should_call_tool=False,
+                tool_calls=[],
+                reasoning_steps=[
+                    "[RULE] General knowledge query - no retrieval needed"
+                ],
+                confidence=88.0,
+                needs_more_data=False,
+                final_answer_ready=True,
+                user_preferences=memory_output.user_preferences
+            )
 
-Step 6: [DECISION_VERIFICATION] Is this the optimal plan?
-   - Self-check: Will these tools get us the answer?
-   - Self-check: Are we calling unnecessary tools?
-   - Self-check: Are we considering user preferences?
+        return None
 
-**COMMON PATTERNS:**
+    @staticmethod
+    def _is_fast_path(memory_output: Any, previous_actions: List[Dict]) -> bool:
+        """Whether the context points so clearly at one pattern that the
+        full rubric is unnecessary"""
+        return (
+            memory_output.has_sufficient_context
+            and memory_output.suggested_method in {"RAG", "GEMINI_KNOWLEDGE"}
+            and not previous_actions
+        )
 
-Pattern A: RAG Answer (we have documents)
-1. retrieve_documents → Get relevant docs
-2. generate_response → Create answer from docs
-3. verify_answer → Check quality
+    def _fast_path_prompt(self, memory_output: Any, previous_actions: List[Dict]) -> str:
+        """
+        Trimmed decision prompt for clear-cut cases
 
-Pattern B: Live Search (need current data)
-1. Skip tools, let Action module use Google Search Grounding
-2. verify_answer → Check quality after
+        When memory already signals RAG or direct knowledge, the model
+        nearly always picks the matching pattern, so the 6-step rubric
+        and the full pattern catalog are wasted prefill tokens. Only the
+        applicable pattern and a minimal schema reminder are sent.
+        """
+        if memory_output.suggested_method == "RAG":
+            pattern = (
+                "Pattern: RAG Answer - we have relevant documents.\n"
+                "1. retrieve_documents(keywords, limit) → Get relevant docs\n"
+                "2. generate_response(query, documents, reasoning_steps) → Create answer\n"
+                "3. verify_answer(answer, sources) → Check quality"
+            )
+        else:
+            pattern = (
+                "Pattern: General Knowledge - no retrieval needed.\n"
+                "1. Skip retrieval tools\n"
+                "2. generate_response(query, documents, reasoning_steps) → Use Gemini knowledge\n"
+                "3. verify_answer(answer, sources) → Check quality"
+            )
 
-Pattern C: General Knowledge (no docs, no live data needed)
-1. Skip retrieval tools
-2. generate_response → Use Gemini knowledge
-3. verify_answer → Check quality
+        return f"""You are the DECISION module of a QA Agent. Decide which tools to call.
 
-Pattern D: Store Content (user wants to save something)
-1. store_document → Save the content
-2. get_statistics → Show updated stats
+**CONTEXT:**
+- Query: {memory_output.original_query}
+- Keywords: {', '.join(memory_output.extracted_keywords)}
+- Suggested Method: {memory_output.suggested_method}
 
-**OUTPUT FORMAT (MANDATORY JSON):**
-```json
-{{
-  "should_call_tool": true/false,
-  "tool_calls": [
-    {{
-      "tool_name": "tool_name_here",
-      "arguments": {{"param1": "value1", "param2": "value2"}},
-      "reasoning": "Why this tool is needed",
-      "priority": 1
-    }}
-  ],
-  "reasoning_steps": [
-    "[GOAL_ANALYSIS] explanation",
-    "[CONTEXT_ASSESSMENT] explanation",
-    "[METHOD_SELECTION] explanation",
-    "[TOOL_SEQUENCE] explanation",
-    "[PREFERENCE_ALIGNMENT] explanation",
-    "[DECISION_VERIFICATION] explanation"
-  ],
-  "confidence": 85,
-  "needs_more_data": false,
-  "final_answer_ready": true
-}}
-```
+**RECOMMENDED APPROACH:**
+{pattern}
 
-**CRITICAL RULES:**
-1. ALWAYS include reasoning_type tags in reasoning_steps
-2. ALWAYS consider user preferences in your decisions
-3. If has_sufficient_context=true and relevant_documents>0, prefer RAG pattern
-4. If requires_live_data=true, prefer live search pattern
-5. Don't call tools unnecessarily - be efficient
-6. Order matters - analyze before retrieve, retrieve before generate
-7. NEVER output anything except valid JSON
+Reply with JSON only: should_call_tool, tool_calls (tool_name,
+arguments_json as a JSON object string, reasoning, priority - equal
+priorities run in parallel), reasoning_steps, confidence,
+needs_more_data, final_answer_ready.
 
 Now decide which tools to call:"""
 
+    def _get_cached_prefix(self) -> Optional[str]:
+        """
+        Get (creating once) the provider-side cache handle for the static
+        decision prefix, so repeated calls skip prefill on ~2-3KB of
+        identical tool catalog, patterns, and rules
+
+        Returns the cache name, or None when context caching is
+        unavailable (e.g. prefix below the provider's minimum size).
+        """
+        global _prefix_cache_name, _prefix_cache_tried
+        with _prefix_cache_lock:
+            if not _prefix_cache_tried:
+                _prefix_cache_tried = True
+                try:
+                    cache = self.client.caches.create(
+                        model="gemini-2.0-flash",
+                        config=types.CreateCachedContentConfig(
+                            contents=[self._static_prefix()],
+                            ttl="3600s"
+                        )
+                    )
+                    _prefix_cache_name = cache.name
+                    log.info("decision prompt prefix cached with provider")
+                except Exception as e:
+                    log.warning("context caching unavailable, inlining prefix: %s", e)
+                    _prefix_cache_name = None
+            return _prefix_cache_name
+
+    def _decision_config(self, cached_prefix: Optional[str] = None) -> types.GenerateContentConfig:
+        """Generation config: constrained JSON decoding, plus the cached prefix"""
+        kwargs: Dict[str, Any] = {
+            "response_mime_type": "application/json",
+            "response_schema": DecisionLLMResponse,
+        }
+        if cached_prefix:
+            kwargs["cached_content"] = cached_prefix
+        return types.GenerateContentConfig(**kwargs)
+
+    def _generate_decision(self, suffix: str):
+        """Call Gemini with the cached static prefix when available"""
+        cached_prefix = self._get_cached_prefix()
+        if cached_prefix:
+            try:
+                return self.client.models.generate_content(
+                    model="gemini-2.0-flash",
+                    contents=suffix,
+                    config=self._decision_config(cached_prefix)
+                )
+            except Exception:
+                # Cache likely expired server-side (TTL); recreate once
+                global _prefix_cache_name, _prefix_cache_tried
+                with _prefix_cache_lock:
+                    _prefix_cache_name = None
+                    _prefix_cache_tried = False
+                cached_prefix = self._get_cached_prefix()
+                if cached_prefix:
+                    return self.client.models.generate_content(
+                        model="gemini-2.0-flash",
+                        contents=suffix,
+                        config=self._decision_config(cached_prefix)
+                    )
+        return self.client.models.generate_content(
+            model="gemini-2.0-flash",
+            contents=self._inline_prefix + suffix,
+            config=self._decision_config()
+        )
+
     def make_decision(self, decision_input: DecisionInput) -> DecisionOutput:
         """
         Make decision about which tools to call
@@ -291,114 +655,135 @@ Now decide which tools to call:"""
             DecisionOutput with tool calls and reasoning
         """
         try:
-            console.print("[bold cyan]🤔 DECISION: Analyzing options...[/bold cyan]")
+            log.debug("DECISION: analyzing options")
             
             memory_output = decision_input.from_memory
             previous_actions = decision_input.previous_actions
-            
-            # Build decision prompt
-            prompt = self._build_decision_prompt(memory_output, previous_actions)
-            
+
+            # Deterministic patterns skip the LLM round trip entirely
+            ruled = self._try_deterministic_decision(memory_output, previous_actions)
+            if ruled is not None:
+                log.debug("decision made by rule (no LLM call)")
+                return ruled
+
+            cached = self._cached_decision(memory_output, previous_actions)
+            if cached is not None:
+                return cached
+
             # Call Gemini for decision
-            console.print("[yellow]→ Calling Gemini for tool selection...[/yellow]")
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            
+            log.debug("calling Gemini for tool selection")
+            if self._is_fast_path(memory_output, previous_actions):
+                # Clear-cut case: skip the full rubric and pattern catalog
+                response = self.client.models.generate_content(
+                    model="gemini-2.0-flash",
+                    contents=self._fast_path_prompt(memory_output, previous_actions),
+                    config=self._decision_config()
+                )
+            else:
+                # Build per-request suffix; the static prefix rides in the
+                # provider-side context cache when available
+                suffix = self._dynamic_suffix(memory_output, previous_actions)
+                response = self._generate_decision(suffix)
+
             response_text = response.text if response and response.text else "{}"
-            
-            # Parse JSON response
+
+            output = self._parse_decision_response(response_text, memory_output)
+            self._store_decision(memory_output, previous_actions, output)
+            return output
+
+        except Exception as e:
+            log.exception("error in decision-making: %s", e)
+
+            # Emergency fallback - minimal decision
+            return DecisionOutput(
+                should_call_tool=False,
+                tool_calls=[],
+                reasoning_steps=[f"[ERROR] {str(e)}"],
+                confidence=0.0,
+                needs_more_data=False,
+                final_answer_ready=True,
+                user_preferences=None
+            )
+
+    async def make_decision_async(self, decision_input: DecisionInput) -> DecisionOutput:
+        """
+        Non-blocking variant of make_decision using the streaming aio client
+
+        The model round trip no longer pins a thread, so callers can
+        overlap decision latency with other work (e.g. warming memory
+        caches), and chunk consumption stops as soon as the closing
+        code fence of the JSON payload arrives.
+        """
+        try:
+            log.debug("DECISION: analyzing options")
+
+            memory_output = decision_input.from_memory
+            previous_actions = decision_input.previous_actions
+
+            # Deterministic patterns skip the LLM round trip entirely
+            ruled = self._try_deterministic_decision(memory_output, previous_actions)
+            if ruled is not None:
+                log.debug("decision made by rule (no LLM call)")
+                return ruled
+
+            cached = self._cached_decision(memory_output, previous_actions)
+            if cached is not None:
+                return cached
+
+            if self._is_fast_path(memory_output, previous_actions):
+                # Clear-cut case: skip the full rubric and pattern catalog
+                cached_prefix = None
+                contents = self._fast_path_prompt(memory_output, previous_actions)
+            else:
+                suffix = self._dynamic_suffix(memory_output, previous_actions)
+                # caches.create is a sync SDK call - keep it off the loop
+                cached_prefix = await asyncio.to_thread(self._get_cached_prefix)
+                if cached_prefix:
+                    contents = suffix
+                else:
+                    contents = self._inline_prefix + suffix
+            config = self._decision_config(cached_prefix)
+
+            log.debug("calling Gemini for tool selection")
+            chunks: List[str] = []
+            fences = 0
             try:
-                # Extract JSON from markdown code blocks if present
-                if "```json" in response_text:
-                    json_start = response_text.find("```json") + 7
-                    json_end = response_text.find("```", json_start)
-                    response_text = response_text[json_start:json_end].strip()
-                elif "```" in response_text:
-                    json_start = response_text.find("```") + 3
-                    json_end = response_text.find("```", json_start)
-                    response_text = response_text[json_start:json_end].strip()
-                
-                decision_data = json.loads(response_text)
-                
-                # Create ToolCall objects
-                tool_calls = []
-                for tc in decision_data.get("tool_calls", []):
-                    tool_calls.append(ToolCall(
-                        tool_name=tc.get("tool_name", "unknown"),
-                        arguments=tc.get("arguments", {}),
-                        reasoning=tc.get("reasoning", "No reasoning provided"),
-                        priority=tc.get("priority", 1)
-                    ))
-                
-                # Create output
-                output = DecisionOutput(
-                    should_call_tool=decision_data.get("should_call_tool", len(tool_calls) > 0),
-                    tool_calls=tool_calls,
-                    reasoning_steps=decision_data.get("reasoning_steps", []),
-                    confidence=decision_data.get("confidence", 70.0),
-                    needs_more_data=decision_data.get("needs_more_data", False),
-                    final_answer_ready=decision_data.get("final_answer_ready", True),
-                    user_preferences=memory_output.user_preferences
+                stream = await self.client.aio.models.generate_content_stream(
+                    model="gemini-2.0-flash",
+                    contents=contents,
+                    config=config
                 )
-                
-                console.print(f"[green]✓ Decision made: {len(tool_calls)} tool(s) to call[/green]")
-                for tc in tool_calls:
-                    console.print(f"[cyan]  • {tc.tool_name}[/cyan]")
-                
-                return output
-                
-            except json.JSONDecodeError as e:
-                console.print(f"[yellow]⚠️  JSON parsing failed, using fallback decision[/yellow]")
-                
-                # Fallback: Use suggested method from memory
-                tool_calls = []
-                reasoning_steps = ["[FALLBACK] Using memory-suggested method"]
-                
-                if memory_output.suggested_method == "RAG" and memory_output.has_sufficient_context:
-                    # RAG pattern
-                    tool_calls = [
-                        ToolCall(
-                            tool_name="retrieve_documents",
-                            arguments={
-                                "keywords": memory_output.extracted_keywords,
-                                "limit": 5
-                            },
-                            reasoning="[FALLBACK] Using RAG based on available documents",
-                            priority=1
-                        ),
-                        ToolCall(
-                            tool_name="verify_answer",
-                            arguments={
-                                "answer": "to_be_generated",
-                                "sources": []
-                            },
-                            reasoning="[FALLBACK] Verify answer quality",
-                            priority=2
-                        )
-                    ]
-                    reasoning_steps.append("[FALLBACK] Selected RAG pattern")
-                else:
-                    # No specific tools needed - will use Gemini directly
-                    reasoning_steps.append("[FALLBACK] Will use Gemini knowledge directly")
-                
-                return DecisionOutput(
-                    should_call_tool=len(tool_calls) > 0,
-                    tool_calls=tool_calls,
-                    reasoning_steps=reasoning_steps,
-                    confidence=60.0,
-                    needs_more_data=False,
-                    final_answer_ready=True,
-                    user_preferences=memory_output.user_preferences
+                async for chunk in stream:
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        # The payload is a single fenced JSON block; once
+                        # the closing fence arrives there is nothing left
+                        # worth waiting for
+                        fences += chunk.text.count("```")
+                        if fences >= 2:
+                            break
+            except Exception:
+                if not cached_prefix:
+                    raise
+                # Cache likely expired server-side; retry inline once
+                chunks = []
+                stream = await self.client.aio.models.generate_content_stream(
+                    model="gemini-2.0-flash",
+                    contents=self._inline_prefix + suffix,
+                    config=self._decision_config()
                 )
-                
+                async for chunk in stream:
+                    if chunk.text:
+                        chunks.append(chunk.text)
+
+            response_text = "".join(chunks) or "{}"
+            output = self._parse_decision_response(response_text, memory_output)
+            self._store_decision(memory_output, previous_actions, output)
+            return output
+
         except Exception as e:
-            console.print(f"[red]❌ Error in decision-making: {e}[/red]")
-            import traceback
-            traceback.print_exc()
-            
-            # Emergency fallback - minimal decision
+            log.exception("error in decision-making: %s", e)
+
             return DecisionOutput(
                 should_call_tool=False,
                 tool_calls=[],
@@ -409,6 +794,275 @@ Now decide which tools to call:"""
                 user_preferences=None
             )
 
+    async def stream_tool_calls(self, decision_input: DecisionInput, final: Optional[Dict] = None):
+        """
+        Yield ToolCall objects as the model emits them
+
+        tool_calls sits near the top of the response schema, so the
+        first call is usually complete long before reasoning_steps and
+        the closing brace. Incremental parsing (ijson push API) lets
+        the executor (ActionAgent.execute_tool_calls) start the first
+        tool's I/O while the model is still generating. Falls back to
+        the full decision when ijson is unavailable or the payload
+        can't be parsed incrementally.
+
+        When a dict is passed as ``final``, the complete DecisionOutput
+        is deposited under ``final["decision"]`` once the stream is
+        exhausted, so callers keep the reasoning/confidence fields
+        without a second model call.
+        """
+        memory_output = decision_input.from_memory
+        previous_actions = decision_input.previous_actions
+
+        # Rule-based decisions are already complete - just emit them
+        ruled = self._try_deterministic_decision(memory_output, previous_actions)
+        if ruled is not None:
+            if final is not None:
+                final["decision"] = ruled
+            for tool_call in ruled.tool_calls:
+                yield tool_call
+            return
+
+        cached = self._cached_decision(memory_output, previous_actions)
+        if cached is not None:
+            if final is not None:
+                final["decision"] = cached
+            for tool_call in cached.tool_calls:
+                yield tool_call
+            return
+
+        if ijson is None:
+            output = await self.make_decision_async(decision_input)
+            if final is not None:
+                final["decision"] = output
+            for tool_call in output.tool_calls:
+                yield tool_call
+            return
+
+        if self._is_fast_path(memory_output, previous_actions):
+            cached_prefix = None
+            contents = self._fast_path_prompt(memory_output, previous_actions)
+        else:
+            suffix = self._dynamic_suffix(memory_output, previous_actions)
+            cached_prefix = await asyncio.to_thread(self._get_cached_prefix)
+            contents = suffix if cached_prefix else self._inline_prefix + suffix
+
+        collected = ijson.sendable_list()
+        parser = ijson.items_coro(collected, 'tool_calls.item')
+        emitted = 0
+        parse_failed = False
+        chunks: List[str] = []
+
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model="gemini-2.0-flash",
+                contents=contents,
+                config=self._decision_config(cached_prefix)
+            )
+            async for chunk in stream:
+                if not chunk.text:
+                    continue
+                chunks.append(chunk.text)
+                if not parse_failed:
+                    try:
+                        parser.send(chunk.text.encode("utf-8"))
+                    except StopIteration:
+                        pass
+                    except Exception:
+                        # Fenced or otherwise non-incremental payload; keep
+                        # accumulating and parse the full text at the end
+                        parse_failed = True
+                while emitted < len(collected):
+                    item = collected[emitted]
+                    emitted += 1
+                    try:
+                        llm_tc = LLMToolCall.model_validate(item)
+                        yield ToolCall(
+                            tool_name=llm_tc.tool_name,
+                            arguments=llm_tc.decoded_arguments(),
+                            reasoning=llm_tc.reasoning,
+                            priority=llm_tc.priority
+                        )
+                    except ValueError:
+                        continue
+            parser.close()
+        except Exception:
+            if emitted > 0:
+                # Calls already yielded may be executing - a fresh
+                # generation could disagree with them, so salvage the
+                # partial payload instead of regenerating
+                output = self._parse_decision_response("".join(chunks) or "{}", memory_output)
+                if final is not None:
+                    final["decision"] = output
+                for tool_call in output.tool_calls[emitted:]:
+                    yield tool_call
+                return
+            if not cached_prefix:
+                raise
+            # Cache likely expired server-side; the non-streaming async
+            # path retries inline
+            output = await self.make_decision_async(decision_input)
+            if final is not None:
+                final["decision"] = output
+            for tool_call in output.tool_calls:
+                yield tool_call
+            return
+
+        output = self._parse_decision_response("".join(chunks) or "{}", memory_output)
+        self._store_decision(memory_output, previous_actions, output)
+        if final is not None:
+            final["decision"] = output
+
+        if parse_failed:
+            # ijson bailed partway; emit whatever the full-text parse
+            # recovered beyond the calls already yielded
+            for tool_call in output.tool_calls[emitted:]:
+                yield tool_call
+
+    def _parse_decision_response(self, response_text: str, memory_output: Any) -> DecisionOutput:
+        """Parse the model's JSON reply into a DecisionOutput (with fallback)"""
+        try:
+            # Extract JSON from markdown code blocks if present
+            m = _JSON_FENCE_RE.search(response_text)
+            payload = m.group(1) if m else response_text.strip()
+
+            # Validate the whole reply in one pydantic-core pass instead
+            # of per-field .get() lookups in a Python loop
+            parsed = DecisionLLMResponse.model_validate_json(payload)
+
+            tool_calls = [
+                ToolCall(
+                    tool_name=tc.tool_name,
+                    arguments=tc.decoded_arguments(),
+                    reasoning=tc.reasoning,
+                    priority=tc.priority
+                )
+                for tc in parsed.tool_calls
+            ]
+
+            # Create output
+            output = DecisionOutput(
+                should_call_tool=parsed.should_call_tool,
+                tool_calls=tool_calls,
+                reasoning_steps=parsed.reasoning_steps,
+                confidence=parsed.confidence,
+                needs_more_data=parsed.needs_more_data,
+                final_answer_ready=parsed.final_answer_ready,
+                user_preferences=memory_output.user_preferences
+            )
+            
+            log.info("decision made: %d tool(s) to call", len(tool_calls))
+            if log.isEnabledFor(logging.DEBUG):
+                for tc in tool_calls:
+                    log.debug("  tool: %s", tc.tool_name)
+            
+            return output
+            
+        except ValueError as e:  # covers json and orjson decode errors
+            log.warning("JSON parsing failed, using fallback decision")
+            
+            # Fallback: Use suggested method from memory
+            tool_calls = []
+            reasoning_steps = ["[FALLBACK] Using memory-suggested method"]
+            
+            if memory_output.suggested_method == "RAG" and memory_output.has_sufficient_context:
+                # RAG pattern
+                tool_calls = [
+                    ToolCall(
+                        tool_name="retrieve_documents",
+                        arguments={
+                            "keywords": memory_output.extracted_keywords,
+                            "limit": 5
+                        },
+                        reasoning="[FALLBACK] Using RAG based on available documents",
+                        priority=1
+                    ),
+                    ToolCall(
+                        tool_name="verify_answer",
+                        arguments={
+                            "answer": "to_be_generated",
+                            "sources": []
+                        },
+                        reasoning="[FALLBACK] Verify answer quality",
+                        priority=2
+                    )
+                ]
+                reasoning_steps.append("[FALLBACK] Selected RAG pattern")
+            else:
+                # No specific tools needed - will use Gemini directly
+                reasoning_steps.append("[FALLBACK] Will use Gemini knowledge directly")
+            
+            return DecisionOutput(
+                should_call_tool=len(tool_calls) > 0,
+                tool_calls=tool_calls,
+                reasoning_steps=reasoning_steps,
+                confidence=60.0,
+                needs_more_data=False,
+                final_answer_ready=True,
+                user_preferences=memory_output.user_preferences
+            )
+
+
+# ============================================================================
+# ASYNC DECISION ENGINE
+# ============================================================================
+
+class AsyncDecisionEngine:
+    """
+    Micro-batching front end for concurrent decisions
+
+    Concurrent make_decision callers submit into a queue; a single
+    worker drains up to MAX_BATCH requests within a short window and
+    flies them together through the shared aio client, so independent
+    decisions multiplex over one connection instead of serializing.
+    """
+
+    BATCH_WINDOW_S = 0.01
+    MAX_BATCH = 8
+
+    def __init__(self, agent: DecisionAgent):
+        self.agent = agent
+        self._queue: "asyncio.Queue" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, decision_input: DecisionInput) -> DecisionOutput:
+        """Queue a decision request and await its result"""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((decision_input, fut))
+        return await fut
+
+    async def aclose(self):
+        """Stop the batching worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Collect whatever else arrives inside the batching window
+            while len(batch) < self.MAX_BATCH:
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._queue.get(), timeout=self.BATCH_WINDOW_S
+                    ))
+                except asyncio.TimeoutError:
+                    break
+
+            results = await asyncio.gather(
+                *[self.agent.make_decision_async(item) for item, _ in batch],
+                return_exceptions=True
+            )
+            for (_, fut), result in zip(batch, results):
+                if fut.cancelled():
+                    continue
+                if isinstance(result, BaseException):
+                    fut.set_exception(result)
+                else:
+                    fut.set_result(result)
+
 
 # ============================================================================
 # STANDALONE TESTING
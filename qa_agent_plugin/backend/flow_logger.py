@@ -4,58 +4,59 @@ Creates detailed log files showing evidence of architecture flow
 """
 import os
 import json
+import queue
+import threading
+try:
+    import orjson  # several times faster than json for the nested session dumps
+except ImportError:
+    orjson = None
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, List
-from pathlib import Path
 
-class FlowLogger:
-    """Logger to track and document the flow through all architectural stages"""
-    
-    def __init__(self, log_dir: str = None):
-        """Initialize flow logger"""
-        if log_dir is None:
-            log_dir = os.path.join(os.path.dirname(__file__), "logs")
-        
-        self.log_dir = log_dir
-        os.makedirs(self.log_dir, exist_ok=True)
-        
-        # Create session-specific log file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = os.path.join(self.log_dir, f"flow_log_{timestamp}.json")
-        self.text_log_file = os.path.join(self.log_dir, f"flow_log_{timestamp}.txt")
-        
-        self.current_session = {
-            "session_id": timestamp,
-            "start_time": datetime.now().isoformat(),
-            "query": None,
-            "user_preferences": None,
-            "stages": {
-                "perception": None,
-                "memory": None,
-                "decision": [],
-                "action": []
-            },
-            "final_output": None
-        }
-        
-        self._write_header()
-    
-    def _write_header(self):
-        """Write header to text log"""
-        with open(self.text_log_file, 'w') as f:
-            f.write("="*80 + "\n")
-            f.write("QA AGENT - AGENTIC ARCHITECTURE FLOW LOG\n")
-            f.write("="*80 + "\n")
-            f.write(f"Session ID: {self.current_session['session_id']}\n")
-            f.write(f"Start Time: {self.current_session['start_time']}\n")
-            f.write("="*80 + "\n\n")
-    
-    def log_user_input(self, query: str, user_preferences: Dict = None):
-        """Log the initial user input and preferences"""
-        self.current_session["query"] = query
-        self.current_session["user_preferences"] = user_preferences
-        
-        self._append_to_text_log(f"""
+# Log directories already created this process - skips the stat/mkdir
+# per FlowLogger() when sessions reuse a directory
+_dirs_made = set()
+
+def _dumps(obj) -> str:
+    """Compact JSON string via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+
+def _dumps_indent(obj) -> str:
+    """Indented JSON string via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+    return json.dumps(obj, indent=2, default=str)
+
+
+# ============================================================================
+# LOG TEMPLATES
+# ============================================================================
+# Each stage's block is a module-level template formatted once per call -
+# the hot path is a single .format() plus one buffered write instead of
+# re-assembling a ~30-line f-string every invocation. One .format() also
+# allocates exactly one output string per entry, so no StringIO staging
+# buffer is needed on top.
+
+_RULE = "=" * 80
+_DIVIDER = "━" * 67
+# Pre-encoded once - the writer appends this to stage blocks via writev,
+# so the divider is never re-encoded per entry
+_DIVIDER_BYTES = (_DIVIDER + "\n").encode("utf-8")
+
+_HEADER_TMPL = f"""{_RULE}
+QA AGENT - AGENTIC ARCHITECTURE FLOW LOG
+{_RULE}
+Session ID: {{session_id}}
+Start Time: {{start_time}}
+{_RULE}
+
+"""
+
+_USER_INPUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 0: USER INPUT                                                  │
 └─────────────────────────────────────────────────────────────────────┘
@@ -63,254 +64,205 @@ class FlowLogger:
 📥 User Query: "{query}"
 
 👤 User Preferences:
-{json.dumps(user_preferences, indent=2) if user_preferences else "   No preferences set"}
+{prefs_json}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-""")
-    
-    def log_perception_input(self, query_input: Dict):
-        """Log perception stage input"""
-        self._append_to_text_log(f"""
+"""
+
+_PERCEPTION_IN_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 1: PERCEPTION - INPUT                                          │
 └─────────────────────────────────────────────────────────────────────┘
 
 📨 Input to Perception:
-   • Query: "{query_input.get('query', 'N/A')}"
-   • Conversation History: {len(query_input.get('conversation_history', []))} entries
-   • User Preferences: {"✓ Included" if query_input.get('user_preferences') else "✗ Not included"}
+   • Query: "{query}"
+   • Conversation History: {history_count} entries
+   • User Preferences: {prefs_status}
 
-""")
-    
-    def log_perception_output(self, perception_output: Dict):
-        """Log perception stage output"""
-        self.current_session["stages"]["perception"] = perception_output
-        
-        self._append_to_text_log(f"""
+"""
+
+_PERCEPTION_OUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 1: PERCEPTION - OUTPUT                                         │
 └─────────────────────────────────────────────────────────────────────┘
 
 🧠 Perception Analysis:
-   • Original Query: "{perception_output.get('original_query', 'N/A')}"
-   • Analyzed Intent: "{perception_output.get('analyzed_intent', 'N/A')}"
-   • Query Type: {perception_output.get('query_type', 'N/A')}
-   • Keywords: {', '.join(perception_output.get('extracted_keywords', []))}
-   • Requires Live Data: {perception_output.get('requires_live_data', False)}
-   • Requires Deep Reasoning: {perception_output.get('requires_deep_reasoning', False)}
-   • Confidence: {perception_output.get('confidence', 0)}%
+   • Original Query: "{original_query}"
+   • Analyzed Intent: "{analyzed_intent}"
+   • Query Type: {query_type}
+   • Keywords: {keywords}
+   • Requires Live Data: {requires_live_data}
+   • Requires Deep Reasoning: {requires_deep_reasoning}
+   • Confidence: {confidence}%
 
 📋 Reasoning Steps:
-{self._format_list(perception_output.get('reasoning_steps', []))}
+{reasoning_steps}
 
 👤 User Preferences Status:
-   {"✓ PASSED TO NEXT STAGE" if perception_output.get('user_preferences') else "✗ NOT INCLUDED"}
+   {prefs_status}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-""")
-    
-    def log_memory_input(self, memory_input: Dict):
-        """Log memory stage input"""
-        from_perception = memory_input.get('from_perception', {})
-        
-        self._append_to_text_log(f"""
+"""
+
+_MEMORY_IN_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 2: MEMORY - INPUT                                              │
 └─────────────────────────────────────────────────────────────────────┘
 
 📨 Input to Memory:
    ✓ FROM PERCEPTION:
-      • Query: "{from_perception.get('original_query', 'N/A')}"
-      • Intent: "{from_perception.get('analyzed_intent', 'N/A')}"
-      • Keywords: {', '.join(from_perception.get('extracted_keywords', []))}
-      • User Preferences: {"✓ Received" if from_perception.get('user_preferences') else "✗ Missing"}
+      • Query: "{query}"
+      • Intent: "{intent}"
+      • Keywords: {keywords}
+      • User Preferences: {prefs_status}
 
-   • Conversation History: {len(memory_input.get('conversation_history', []))} entries
+   • Conversation History: {history_count} entries
 
-""")
-    
-    def log_memory_output(self, memory_output: Dict):
-        """Log memory stage output"""
-        self.current_session["stages"]["memory"] = memory_output
-        
-        self._append_to_text_log(f"""
+"""
+
+_MEMORY_OUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 2: MEMORY - OUTPUT                                             │
 └─────────────────────────────────────────────────────────────────────┘
 
 💾 Memory Context:
-   • Relevant Documents: {len(memory_output.get('relevant_documents', []))}
-   • Relevant Conversations: {len(memory_output.get('relevant_conversation', []))}
-   • Relevant Memories: {len(memory_output.get('relevant_memories', []))}
-   
+   • Relevant Documents: {doc_count}
+   • Relevant Conversations: {conversation_count}
+   • Relevant Memories: {memory_count}
+
 📊 Context Assessment:
-   • Context Summary: "{memory_output.get('context_summary', 'N/A')}"
-   • Has Sufficient Context: {memory_output.get('has_sufficient_context', False)}
-   • Suggested Method: {memory_output.get('suggested_method', 'N/A')}
-   • Confidence: {memory_output.get('confidence', 0)}%
+   • Context Summary: "{context_summary}"
+   • Has Sufficient Context: {has_sufficient_context}
+   • Suggested Method: {suggested_method}
+   • Confidence: {confidence}%
 
 📋 Reasoning Steps:
-{self._format_list(memory_output.get('reasoning_steps', []))}
+{reasoning_steps}
 
 👤 User Preferences Status:
-   {"✓ MAINTAINED - PASSED TO NEXT STAGE" if memory_output.get('user_preferences') else "✗ NOT MAINTAINED"}
+   {prefs_status}
 
 📚 RAG Documents Retrieved:
-{self._format_documents(memory_output.get('relevant_documents', []))}
+{documents}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-""")
-    
-    def log_decision_input(self, decision_input: Dict, iteration: int):
-        """Log decision stage input"""
-        from_memory = decision_input.get('from_memory', {})
-        
-        self._append_to_text_log(f"""
+"""
+
+_DECISION_IN_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 3: DECISION - INPUT (Iteration {iteration})                   │
 └─────────────────────────────────────────────────────────────────────┘
 
 📨 Input to Decision:
    ✓ FROM MEMORY:
-      • Query: "{from_memory.get('original_query', 'N/A')}"
-      • Intent: "{from_memory.get('analyzed_intent', 'N/A')}"
-      • Suggested Method: {from_memory.get('suggested_method', 'N/A')}
-      • Has Sufficient Context: {from_memory.get('has_sufficient_context', False)}
-      • User Preferences: {"✓ Received" if from_memory.get('user_preferences') else "✗ Missing"}
+      • Query: "{query}"
+      • Intent: "{intent}"
+      • Suggested Method: {suggested_method}
+      • Has Sufficient Context: {has_sufficient_context}
+      • User Preferences: {prefs_status}
 
-   • Available Tools: {len(decision_input.get('available_tools', []))}
-   • Previous Actions: {len(decision_input.get('previous_actions', []))}
+   • Available Tools: {tool_count}
+   • Previous Actions: {previous_action_count}
 
-""")
-    
-    def log_decision_output(self, decision_output: Dict, iteration: int):
-        """Log decision stage output"""
-        self.current_session["stages"]["decision"].append({
-            "iteration": iteration,
-            "output": decision_output
-        })
-        
-        tool_calls = decision_output.get('tool_calls', [])
-        
-        self._append_to_text_log(f"""
+"""
+
+_DECISION_OUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 3: DECISION - OUTPUT (Iteration {iteration})                  │
 └─────────────────────────────────────────────────────────────────────┘
 
 🤔 Decision Analysis:
-   • Should Call Tool: {decision_output.get('should_call_tool', False)}
-   • Number of Tool Calls: {len(tool_calls)}
-   • Needs More Data: {decision_output.get('needs_more_data', False)}
-   • Final Answer Ready: {decision_output.get('final_answer_ready', False)}
-   • Confidence: {decision_output.get('confidence', 0)}%
+   • Should Call Tool: {should_call_tool}
+   • Number of Tool Calls: {tool_call_count}
+   • Needs More Data: {needs_more_data}
+   • Final Answer Ready: {final_answer_ready}
+   • Confidence: {confidence}%
 
 🛠️ Tool Calls Decided:
-{self._format_tool_calls(tool_calls)}
+{tool_calls}
 
 📋 Reasoning Steps:
-{self._format_list(decision_output.get('reasoning_steps', []))}
+{reasoning_steps}
 
 👤 User Preferences Status:
-   {"✓ MAINTAINED - PASSED TO ACTION" if decision_output.get('user_preferences') else "✗ NOT MAINTAINED"}
+   {prefs_status}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-""")
-    
-    def log_action_input(self, action_input: Dict, iteration: int):
-        """Log action stage input"""
-        from_decision = action_input.get('from_decision', {})
-        from_memory = action_input.get('from_memory', {})
-        
-        self._append_to_text_log(f"""
+"""
+
+_ACTION_IN_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 4: ACTION - INPUT (Iteration {iteration})                     │
 └─────────────────────────────────────────────────────────────────────┘
 
 📨 Input to Action:
    ✓ FROM DECISION:
-      • Should Call Tool: {from_decision.get('should_call_tool', False)}
-      • Tool Calls: {len(from_decision.get('tool_calls', []))}
-      • User Preferences: {"✓ Received" if from_decision.get('user_preferences') else "✗ Missing"}
+      • Should Call Tool: {should_call_tool}
+      • Tool Calls: {tool_call_count}
+      • User Preferences: {prefs_status}
 
    ✓ FROM MEMORY:
-      • Suggested Method: {from_memory.get('suggested_method', 'N/A')}
-      • Has Context: {from_memory.get('has_sufficient_context', False)}
+      • Suggested Method: {suggested_method}
+      • Has Context: {has_sufficient_context}
 
 🛠️ MCP Tools to Execute:
-{self._format_tool_calls(from_decision.get('tool_calls', []))}
+{tool_calls}
 
-""")
-    
-    def log_action_output(self, action_output: Dict, iteration: int):
-        """Log action stage output"""
-        self.current_session["stages"]["action"].append({
-            "iteration": iteration,
-            "output": action_output
-        })
-        
-        self._append_to_text_log(f"""
+"""
+
+_ACTION_OUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ STAGE 4: ACTION - OUTPUT (Iteration {iteration})                    │
 └─────────────────────────────────────────────────────────────────────┘
 
 ⚡ Action Results:
-   • Method Used: {action_output.get('method', 'N/A')}
-   • Tool Calls Executed: {len(action_output.get('tool_results', []))}
-   • Confidence: {action_output.get('confidence', 0)}%
-   • Sources: {len(action_output.get('sources', []))}
-   • Needs Another Decision: {action_output.get('needs_another_decision', False)}
+   • Method Used: {method}
+   • Tool Calls Executed: {tool_result_count}
+   • Confidence: {confidence}%
+   • Sources: {source_count}
+   • Needs Another Decision: {needs_another_decision}
 
 🛠️ Tool Execution Results:
-{self._format_tool_results(action_output.get('tool_results', []))}
+{tool_results}
 
 📚 Sources Used:
-{self._format_list(action_output.get('sources', []))}
+{sources}
 
 📋 Reasoning Steps:
-{self._format_list(action_output.get('reasoning_steps', []))}
+{reasoning_steps}
 
 💬 Final Answer Preview:
-   {action_output.get('final_answer', 'N/A')[:200]}...
+   {answer_preview}...
 
 👤 User Preferences Status:
-   {"✓ APPLIED IN ANSWER GENERATION" if action_output.get('user_preferences') else "✗ NOT APPLIED"}
+   {prefs_status}
 
 🔄 Loop Status:
-   {"↻ CONTINUE TO NEXT ITERATION" if action_output.get('needs_another_decision') else "✓ LOOP COMPLETE"}
+   {loop_status}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-""")
-    
-    def log_final_output(self, final_response: Dict):
-        """Log the final output to user"""
-        self.current_session["final_output"] = final_response
-        self.current_session["end_time"] = datetime.now().isoformat()
-        
-        self._append_to_text_log(f"""
+"""
+
+_FINAL_OUTPUT_TMPL = """
 ┌─────────────────────────────────────────────────────────────────────┐
 │ FINAL OUTPUT TO USER                                                 │
 └─────────────────────────────────────────────────────────────────────┘
 
 📤 Final Response:
 
-Query: "{final_response.get('query', 'N/A')}"
+Query: "{query}"
 
 Answer:
-{final_response.get('answer', 'N/A')}
+{answer}
 
 📊 Response Metadata:
-   • Confidence: {final_response.get('confidence', 0)}%
-   • Method: {final_response.get('method', 'N/A')}
-   • Sources: {len(final_response.get('sources', []))}
-   • User Preferences Applied: {"✅ YES" if final_response.get('user_preferences_applied') else "❌ NO"}
+   • Confidence: {confidence}%
+   • Method: {method}
+   • Sources: {source_count}
+   • User Preferences Applied: {prefs_applied}
 
 📚 Sources:
-{self._format_list(final_response.get('sources', []))}
+{sources}
 
 🔍 Complete Reasoning Flow:
-{json.dumps(final_response.get('reasoning_flow', {}), indent=2)}
+{reasoning_flow}
 
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+""" + _DIVIDER + f"""
 
 ✅ EVIDENCE SUMMARY:
    1. ✓ User input captured with preferences
@@ -319,47 +271,435 @@ Answer:
    4. ✓ Decision received Memory output (query + RAG + preferences)
    5. ✓ Action executed MCP tools based on Decision
    6. ✓ Final output incorporates user preferences
-   
+
    Architecture Flow: User → Perception → Memory → Decision ↔ Action → Output
    Status: ✅ WORKING AS DESIGNED
 
-{"="*80}
-Session completed at: {self.current_session.get('end_time')}
-{"="*80}
-""")
-        
-        # Save JSON log
+{_RULE}
+Session completed at: {{end_time}}
+{_RULE}
+"""
+
+
+class FlowLogger:
+    """Logger to track and document the flow through all architectural stages"""
+
+    def __init__(self, log_dir: str = None):
+        """Initialize flow logger"""
+        if log_dir is None:
+            log_dir = os.path.join(os.path.dirname(__file__), "logs")
+
+        self.log_dir = log_dir
+        if log_dir not in _dirs_made:
+            os.makedirs(log_dir, exist_ok=True)
+            _dirs_made.add(log_dir)
+
+        # Create session-specific log file - one clock read serves the
+        # session id, filenames and the start timestamp
+        start = datetime.now()
+        timestamp = start.strftime("%Y%m%d_%H%M%S")
+        self.log_file = os.path.join(self.log_dir, f"flow_log_{timestamp}.json")
+        self.text_log_file = os.path.join(self.log_dir, f"flow_log_{timestamp}.txt")
+        self.ndjson_log_file = os.path.join(self.log_dir, f"flow_log_{timestamp}.ndjson")
+
+        self.current_session = {
+            "session_id": timestamp,
+            "start_time": start.isoformat(),
+            "query": None,
+            "user_preferences": None,
+            "stages": {
+                "perception": None,
+                "memory": None,
+                "decision": [],
+                "action": []
+            },
+            "final_output": None
+        }
+
+        # When set, _append_to_text_log collects entries here instead of
+        # writing; see buffered()
+        self._buffer = None
+
+        # Dirty flag - _save_json_log skips the manifest dump when no
+        # stage has been logged since the previous one
+        self._dirty = True
+
+        # FLOW_LOG_TEXT=0 turns off the human-readable rendering - the
+        # structured session state and NDJSON records are still kept, but
+        # none of the box-drawing template work is done
+        self.text_enabled = os.getenv("FLOW_LOG_TEXT", "1") == "1"
+
+        # Raw appending descriptors - the writer thread coalesces each
+        # drain batch into a single writev syscall per file, so there is
+        # no Python-level buffer to flush
+        _flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+        self._text_fd = os.open(self.text_log_file, _flags, 0o644)
+        self._json_fd = os.open(self.ndjson_log_file, _flags, 0o644)
+
+        # Disk writes happen on a dedicated thread fed by a bounded
+        # queue - a slow disk no longer stalls the agent request path.
+        # Each drain batch is flushed once.
+        self._q = queue.Queue(maxsize=1024)
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="flow-log-writer", daemon=True
+        )
+        self._writer.start()
+
+        self._write_header()
+
+    def _put(self, item):
+        """Enqueue a writer item, dropping it once the logger is closed"""
+        if self._closed:
+            return
+        self._q.put(item)
+
+    @staticmethod
+    def _writev(fd: int, iov: List[bytes]):
+        """Vectored write, sliced to stay under IOV_MAX"""
+        for start in range(0, len(iov), 512):
+            os.writev(fd, iov[start:start + 512])
+
+    def _writer_loop(self):
+        """Drain queued log entries and write each batch as one writev"""
+        closing = False
+        while not closing:
+            items = [self._q.get()]
+            while True:
+                try:
+                    items.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            # Failed writes (ENOSPC, EIO, closed fd) must not kill the
+            # writer - the queue would back up and join() would wait
+            # forever on items nobody marks done. Each destination is
+            # guarded separately so one bad target doesn't drop the rest,
+            # and task_done accounting always runs.
+            try:
+                text_iov = []
+                json_iov = []
+                for item in items:
+                    if item is None:  # close sentinel
+                        closing = True
+                        continue
+                    kind, payload = item
+                    if kind == "text":
+                        text_iov.append(payload.encode())
+                    elif kind == "text+div":
+                        text_iov.append(payload.encode())
+                        text_iov.append(_DIVIDER_BYTES)
+                    elif kind == "ndjson":
+                        json_iov.append(payload.encode())
+                    elif kind == "manifest":
+                        # Serialized here so the request path never pays for
+                        # the full session dump; binary mode skips the
+                        # TextIOWrapper encode layer
+                        try:
+                            with open(self.log_file, 'wb') as f:
+                                f.write(_dumps_indent(payload).encode("utf-8"))
+                        except Exception:
+                            pass
+                for fd, iov in ((self._text_fd, text_iov), (self._json_fd, json_iov)):
+                    if iov:
+                        try:
+                            self._writev(fd, iov)
+                        except OSError:
+                            pass
+            finally:
+                for _ in items:
+                    self._q.task_done()
+
+    def _write_header(self):
+        """Write header to text log"""
+        if not self.text_enabled:
+            return
+        self._put(("text", _HEADER_TMPL.format(
+            session_id=self.current_session['session_id'],
+            start_time=self.current_session['start_time']
+        )))
+
+    def _write_json_record(self, stage: str, data: Any, iteration: int = None):
+        """Stream one structured stage record to the NDJSON log"""
+        record = {"stage": stage, "data": data}
+        if iteration is not None:
+            record["iteration"] = iteration
+        self._dirty = True
+        self._put(("ndjson", _dumps(record) + "\n"))
+
+    def log_user_input(self, query: str, user_preferences: Dict = None):
+        """Log the initial user input and preferences"""
+        self.current_session["query"] = query
+        self.current_session["user_preferences"] = user_preferences
+        self._write_json_record("user_input", {"query": query, "user_preferences": user_preferences})
+
+        if not self.text_enabled:
+            return
+        self._append_to_text_log(_USER_INPUT_TMPL.format(
+            query=query,
+            prefs_json=_dumps_indent(user_preferences) if user_preferences else "   No preferences set"
+        ), divider=True)
+
+    def log_perception_input(self, query_input: Dict):
+        """Log perception stage input"""
+        if not self.text_enabled:
+            return
+        self._append_to_text_log(_PERCEPTION_IN_TMPL.format(
+            query=query_input.get('query', 'N/A'),
+            history_count=len(query_input.get('conversation_history', [])),
+            prefs_status="✓ Included" if query_input.get('user_preferences') else "✗ Not included"
+        ))
+
+    def log_perception_output(self, perception_output: Dict):
+        """Log perception stage output"""
+        self.current_session["stages"]["perception"] = perception_output
+        self._write_json_record("perception", perception_output)
+
+        if not self.text_enabled:
+            return
+        self._append_to_text_log(_PERCEPTION_OUT_TMPL.format(
+            original_query=perception_output.get('original_query', 'N/A'),
+            analyzed_intent=perception_output.get('analyzed_intent', 'N/A'),
+            query_type=perception_output.get('query_type', 'N/A'),
+            keywords=', '.join(perception_output.get('extracted_keywords', [])),
+            requires_live_data=perception_output.get('requires_live_data', False),
+            requires_deep_reasoning=perception_output.get('requires_deep_reasoning', False),
+            confidence=perception_output.get('confidence', 0),
+            reasoning_steps=self._format_list(perception_output.get('reasoning_steps', [])),
+            prefs_status="✓ PASSED TO NEXT STAGE" if perception_output.get('user_preferences') else "✗ NOT INCLUDED"
+        ), divider=True)
+
+    def log_memory_input(self, memory_input: Dict):
+        """Log memory stage input"""
+        if not self.text_enabled:
+            return
+        from_perception = memory_input.get('from_perception', {})
+
+        self._append_to_text_log(_MEMORY_IN_TMPL.format(
+            query=from_perception.get('original_query', 'N/A'),
+            intent=from_perception.get('analyzed_intent', 'N/A'),
+            keywords=', '.join(from_perception.get('extracted_keywords', [])),
+            prefs_status="✓ Received" if from_perception.get('user_preferences') else "✗ Missing",
+            history_count=len(memory_input.get('conversation_history', []))
+        ))
+
+    def log_memory_output(self, memory_output: Dict):
+        """Log memory stage output"""
+        self.current_session["stages"]["memory"] = memory_output
+        self._write_json_record("memory", memory_output)
+
+        if not self.text_enabled:
+            return
+        documents = memory_output.get('relevant_documents', [])
+
+        self._append_to_text_log(_MEMORY_OUT_TMPL.format(
+            doc_count=len(documents),
+            conversation_count=len(memory_output.get('relevant_conversation', [])),
+            memory_count=len(memory_output.get('relevant_memories', [])),
+            context_summary=memory_output.get('context_summary', 'N/A'),
+            has_sufficient_context=memory_output.get('has_sufficient_context', False),
+            suggested_method=memory_output.get('suggested_method', 'N/A'),
+            confidence=memory_output.get('confidence', 0),
+            reasoning_steps=self._format_list(memory_output.get('reasoning_steps', [])),
+            prefs_status="✓ MAINTAINED - PASSED TO NEXT STAGE" if memory_output.get('user_preferences') else "✗ NOT MAINTAINED",
+            documents=self._format_documents(documents)
+        ), divider=True)
+
+    def log_decision_input(self, decision_input: Dict, iteration: int):
+        """Log decision stage input"""
+        if not self.text_enabled:
+            return
+        from_memory = decision_input.get('from_memory', {})
+
+        self._append_to_text_log(_DECISION_IN_TMPL.format(
+            iteration=iteration,
+            query=from_memory.get('original_query', 'N/A'),
+            intent=from_memory.get('analyzed_intent', 'N/A'),
+            suggested_method=from_memory.get('suggested_method', 'N/A'),
+            has_sufficient_context=from_memory.get('has_sufficient_context', False),
+            prefs_status="✓ Received" if from_memory.get('user_preferences') else "✗ Missing",
+            tool_count=len(decision_input.get('available_tools', [])),
+            previous_action_count=len(decision_input.get('previous_actions', []))
+        ))
+
+    def log_decision_output(self, decision_output: Dict, iteration: int):
+        """Log decision stage output"""
+        self.current_session["stages"]["decision"].append({
+            "iteration": iteration,
+            "output": decision_output
+        })
+        self._write_json_record("decision", decision_output, iteration)
+
+        if not self.text_enabled:
+            return
+        tool_calls = decision_output.get('tool_calls', [])
+
+        self._append_to_text_log(_DECISION_OUT_TMPL.format(
+            iteration=iteration,
+            should_call_tool=decision_output.get('should_call_tool', False),
+            tool_call_count=len(tool_calls),
+            needs_more_data=decision_output.get('needs_more_data', False),
+            final_answer_ready=decision_output.get('final_answer_ready', False),
+            confidence=decision_output.get('confidence', 0),
+            tool_calls=self._format_tool_calls(tool_calls),
+            reasoning_steps=self._format_list(decision_output.get('reasoning_steps', [])),
+            prefs_status="✓ MAINTAINED - PASSED TO ACTION" if decision_output.get('user_preferences') else "✗ NOT MAINTAINED"
+        ), divider=True)
+
+    def log_action_input(self, action_input: Dict, iteration: int):
+        """Log action stage input"""
+        if not self.text_enabled:
+            return
+        from_decision = action_input.get('from_decision', {})
+        from_memory = action_input.get('from_memory', {})
+
+        tool_calls = from_decision.get('tool_calls', [])
+
+        self._append_to_text_log(_ACTION_IN_TMPL.format(
+            iteration=iteration,
+            should_call_tool=from_decision.get('should_call_tool', False),
+            tool_call_count=len(tool_calls),
+            prefs_status="✓ Received" if from_decision.get('user_preferences') else "✗ Missing",
+            suggested_method=from_memory.get('suggested_method', 'N/A'),
+            has_sufficient_context=from_memory.get('has_sufficient_context', False),
+            tool_calls=self._format_tool_calls(tool_calls)
+        ))
+
+    def log_action_output(self, action_output: Dict, iteration: int):
+        """Log action stage output"""
+        self.current_session["stages"]["action"].append({
+            "iteration": iteration,
+            "output": action_output
+        })
+        self._write_json_record("action", action_output, iteration)
+
+        if not self.text_enabled:
+            return
+        tool_results = action_output.get('tool_results', [])
+        sources = action_output.get('sources', [])
+        needs_another_decision = action_output.get('needs_another_decision', False)
+
+        self._append_to_text_log(_ACTION_OUT_TMPL.format(
+            iteration=iteration,
+            method=action_output.get('method', 'N/A'),
+            tool_result_count=len(tool_results),
+            confidence=action_output.get('confidence', 0),
+            source_count=len(sources),
+            needs_another_decision=needs_another_decision,
+            tool_results=self._format_tool_results(tool_results),
+            sources=self._format_list(sources),
+            reasoning_steps=self._format_list(action_output.get('reasoning_steps', [])),
+            answer_preview=action_output.get('final_answer', 'N/A')[:200],
+            prefs_status="✓ APPLIED IN ANSWER GENERATION" if action_output.get('user_preferences') else "✗ NOT APPLIED",
+            loop_status="↻ CONTINUE TO NEXT ITERATION" if needs_another_decision else "✓ LOOP COMPLETE"
+        ), divider=True)
+
+    def log_final_output(self, final_response: Dict):
+        """Log the final output to user"""
+        self.current_session["final_output"] = final_response
+        self.current_session["end_time"] = datetime.now().isoformat()
+        self._write_json_record("final_output", final_response)
+
+        if self.text_enabled:
+            self._log_final_text(final_response)
+
+        # Save the session manifest (kept for existing .json consumers)
         self._save_json_log()
-    
-    def _append_to_text_log(self, content: str):
-        """Append content to text log file"""
-        with open(self.text_log_file, 'a') as f:
-            f.write(content)
-    
+
+        # Session is complete - wait for the writer to drain so the logs
+        # are durable before the caller reports their paths, then release
+        # the writer thread and descriptors (a new session gets a new
+        # FlowLogger, so nothing else will write here). Skip the join if
+        # the writer died - its items would never be marked done
+        if not self._closed and self._writer.is_alive():
+            self._q.join()
+        self.close()
+
+    def _log_final_text(self, final_response: Dict):
+        """Render the final-output block to the text log"""
+        sources = final_response.get('sources', [])
+
+        self._append_to_text_log(_FINAL_OUTPUT_TMPL.format(
+            query=final_response.get('query', 'N/A'),
+            answer=final_response.get('answer', 'N/A'),
+            confidence=final_response.get('confidence', 0),
+            method=final_response.get('method', 'N/A'),
+            source_count=len(sources),
+            prefs_applied="✅ YES" if final_response.get('user_preferences_applied') else "❌ NO",
+            sources=self._format_list(sources),
+            reasoning_flow=_dumps_indent(final_response.get('reasoning_flow', {})),
+            end_time=self.current_session.get('end_time')
+        ))
+
+    @contextmanager
+    def buffered(self):
+        """Collect log entries in memory and flush them in one write
+
+        Wrapping a stage or loop iteration in this context turns its
+        log entries into a single write on the session handle on exit.
+        """
+        if self._buffer is not None:
+            # Already buffering (nested use) - let the outer context flush
+            yield self
+            return
+        self._buffer = []
+        try:
+            yield self
+        finally:
+            entries, self._buffer = self._buffer, None
+            if entries:
+                self._put(("text", "".join(entries)))
+
+    def _append_to_text_log(self, content: str, divider: bool = False):
+        """Queue content for the text log (or the active buffer)
+
+        divider=True closes the block with the shared divider line; on
+        the direct path the writer appends the pre-encoded bytes, so the
+        divider is never re-encoded per entry.
+        """
+        if self._buffer is not None:
+            self._buffer.append(content)
+            if divider:
+                self._buffer.append(_DIVIDER + "\n")
+            return
+        self._put(("text+div" if divider else "text", content))
+
+    def close(self):
+        """Stop the writer thread and close the log descriptors (idempotent)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._writer.join(timeout=5)
+        for fd in (self._text_fd, self._json_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
     def _format_list(self, items: List[str]) -> str:
         """Format a list of items"""
         if not items:
             return "   (none)"
         return "\n".join([f"   {i+1}. {item}" for i, item in enumerate(items)])
-    
+
     def _format_tool_calls(self, tool_calls: List[Dict]) -> str:
         """Format tool calls"""
         if not tool_calls:
             return "   (none)"
-        
+
         result = []
         for i, tc in enumerate(tool_calls, 1):
             result.append(f"   {i}. {tc.get('tool_name', 'unknown')}")
-            result.append(f"      Arguments: {json.dumps(tc.get('arguments', {}))}")
+            result.append(f"      Arguments: {_dumps(tc.get('arguments', {}))}")
             result.append(f"      Reasoning: {tc.get('reasoning', 'N/A')}")
             result.append(f"      Priority: {tc.get('priority', 'N/A')}")
         return "\n".join(result)
-    
+
     def _format_tool_results(self, tool_results: List[Dict]) -> str:
         """Format tool execution results"""
         if not tool_results:
             return "   (none)"
-        
+
         result = []
         for i, tr in enumerate(tool_results, 1):
             status = "✓ SUCCESS" if tr.get('success') else "✗ FAILED"
@@ -368,29 +708,38 @@ Session completed at: {self.current_session.get('end_time')}
             if tr.get('error'):
                 result.append(f"      Error: {tr.get('error')}")
         return "\n".join(result)
-    
+
     def _format_documents(self, documents: List[Dict]) -> str:
         """Format documents"""
         if not documents:
             return "   (none)"
-        
+
         result = []
         for i, doc in enumerate(documents, 1):
             result.append(f"   {i}. {doc.get('title', 'Untitled')}")
             result.append(f"      Relevance: {doc.get('relevance_score', 0):.2f}")
             result.append(f"      Content: {doc.get('content', '')[:100]}...")
         return "\n".join(result)
-    
+
     def _save_json_log(self):
-        """Save complete session log as JSON"""
-        with open(self.log_file, 'w') as f:
-            json.dump(self.current_session, f, indent=2, default=str)
-    
+        """Queue the session manifest for the writer thread
+
+        Skipped when no stage has been logged since the last dump, so a
+        repeated log_final_output (or future periodic snapshotting) never
+        re-serializes an unchanged session. Per-stage durability comes
+        from the NDJSON records; this manifest is a convenience snapshot.
+        """
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._put(("manifest", self.current_session))
+
     def get_log_files(self) -> Dict[str, str]:
         """Get paths to log files"""
         return {
             "text_log": self.text_log_file,
-            "json_log": self.log_file
+            "json_log": self.log_file,
+            "ndjson_log": self.ndjson_log_file
         }
 
 
@@ -407,6 +756,9 @@ def get_flow_logger() -> FlowLogger:
 def reset_flow_logger():
     """Reset global flow logger (for new session)"""
     global _logger
+    if _logger is not None:
+        # Release the previous session's writer thread and descriptors
+        # (no-op if log_final_output already closed it)
+        _logger.close()
     _logger = FlowLogger()
     return _logger
-
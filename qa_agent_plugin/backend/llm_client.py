@@ -0,0 +1,17 @@
+"""
+Shared Gemini client factory
+
+Each agent stage used to build its own genai.Client, duplicating TLS
+setup and HTTP connection pools across Perception, Decision and Action.
+One client per API key lets the whole pipeline reuse a single keep-alive
+connection pool.
+"""
+from functools import lru_cache
+
+from google import genai
+
+
+@lru_cache(maxsize=4)
+def get_client(api_key: str) -> genai.Client:
+    """The shared genai.Client for an API key (created on first use)"""
+    return genai.Client(api_key=api_key)
@@ -3,7 +3,9 @@ Main Orchestrator - Coordinates the entire agentic architecture
 Manages: Perception → Memory → Decision ↔ Action loop with user preferences
 """
 import os
+import json
 import asyncio
+import logging
 from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 from rich.console import Console
@@ -59,6 +61,61 @@ class AgentResponse(BaseModel):
 # USER PREFERENCE COLLECTION
 # ============================================================================
 
+# Saved answers let returning users skip the questionnaire entirely
+_PREFS_CACHE_PATH = os.path.expanduser("~/.qa_agent_prefs.json")
+
+# Full questionnaire as one panel so the terminal renders a single block
+# instead of seven separate print/flush cycles
+_QUESTIONNAIRE = (
+    "[bold]1. What is your expertise level?[/bold]\n"
+    "   • beginner: New to most topics, need simple explanations\n"
+    "   • intermediate: Have some background, understand technical terms\n"
+    "   • expert: Deep knowledge, prefer detailed technical explanations\n\n"
+    "[bold]2. What response style do you prefer?[/bold]\n"
+    "   • concise: Brief, to-the-point answers\n"
+    "   • balanced: Clear explanations with key details\n"
+    "   • detailed: Comprehensive, in-depth explanations\n\n"
+    "[bold]3. How deep should explanations go?[/bold]\n"
+    "   • shallow: High-level overview only\n"
+    "   • moderate: Main concepts explained clearly\n"
+    "   • deep: Underlying mechanisms and nuances\n\n"
+    "[bold]4. What are your main areas of interest?[/bold]\n"
+    "   (e.g., technology, science, business, health, AI, etc.)\n"
+    "   Enter comma-separated topics or press Enter to skip\n\n"
+    "[bold]5. Your location (optional)[/bold]\n"
+    "   This helps provide context-relevant information\n"
+    "   (e.g., San Francisco, USA or London, UK)\n\n"
+    "[bold]6. What types of sources do you prefer?[/bold]\n"
+    "   • academic: Research papers, scholarly articles\n"
+    "   • news: News articles, current events\n"
+    "   • blogs: Technical blogs, opinion pieces\n"
+    "   • official docs: Official documentation, whitepapers\n"
+    "   Enter comma-separated choices or press Enter for all\n\n"
+    "[bold]7. How important is timeliness of information?[/bold]\n"
+    "   • low: Established knowledge is fine\n"
+    "   • moderate: Recent information preferred\n"
+    "   • high: Need latest/real-time information"
+)
+
+
+def _load_saved_preferences() -> Optional[UserPreference]:
+    """Load previously saved preferences, or None if absent/invalid"""
+    try:
+        with open(_PREFS_CACHE_PATH, "r", encoding="utf-8") as f:
+            return UserPreference(**json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def _save_preferences(preferences: UserPreference) -> None:
+    """Best-effort persist of preferences for future sessions"""
+    try:
+        with open(_PREFS_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(preferences.model_dump(), f, indent=2)
+    except OSError:
+        pass
+
+
 def collect_user_preferences(interactive: bool = True) -> UserPreference:
     """
     Collect user preferences before starting agentic flow
@@ -67,8 +124,16 @@ def collect_user_preferences(interactive: bool = True) -> UserPreference:
     if not interactive:
         # Use defaults for non-interactive mode
         return UserPreference()
-    
+
     try:
+        # Returning users skip the questionnaire with their saved profile
+        saved = _load_saved_preferences()
+        if saved is not None and Confirm.ask(
+            "\n[bold cyan]Found saved preferences — use them?[/bold cyan]",
+            default=True
+        ):
+            return saved
+
         console.print(Panel(
             "[bold cyan]🎯 Welcome to QA Agent with Personalization![/bold cyan]\n\n"
             "Before we begin, let's understand your preferences to provide\n"
@@ -76,81 +141,42 @@ def collect_user_preferences(interactive: bool = True) -> UserPreference:
             title="Preference Setup",
             border_style="cyan"
         ))
-        # 1. Expertise Level
-        console.print("\n[bold]1. What is your expertise level?[/bold]")
-        console.print("   • beginner: New to most topics, need simple explanations")
-        console.print("   • intermediate: Have some background, understand technical terms")
-        console.print("   • expert: Deep knowledge, prefer detailed technical explanations")
-        
+        # Render the whole questionnaire in one flush, then collect answers
+        console.print(Panel(_QUESTIONNAIRE, title="Questions", border_style="cyan"))
+
         expertise = Prompt.ask(
-            "Your expertise level",
+            "1. Your expertise level",
             choices=["beginner", "intermediate", "expert"],
             default="intermediate"
         )
-        
-        # 2. Response Style
-        console.print("\n[bold]2. What response style do you prefer?[/bold]")
-        console.print("   • concise: Brief, to-the-point answers")
-        console.print("   • balanced: Clear explanations with key details")
-        console.print("   • detailed: Comprehensive, in-depth explanations")
-        
+
         style = Prompt.ask(
-            "Your response style",
+            "2. Your response style",
             choices=["concise", "balanced", "detailed"],
             default="balanced"
         )
-        
-        # 3. Depth Preference
-        console.print("\n[bold]3. How deep should explanations go?[/bold]")
-        console.print("   • shallow: High-level overview only")
-        console.print("   • moderate: Main concepts explained clearly")
-        console.print("   • deep: Underlying mechanisms and nuances")
-        
+
         depth = Prompt.ask(
-            "Your depth preference",
+            "3. Your depth preference",
             choices=["shallow", "moderate", "deep"],
             default="moderate"
         )
-        
-        # 4. Focus Areas
-        console.print("\n[bold]4. What are your main areas of interest?[/bold]")
-        console.print("   (e.g., technology, science, business, health, AI, etc.)")
-        console.print("   Enter comma-separated topics or press Enter to skip")
-        
-        focus_input = Prompt.ask("Your focus areas", default="")
+
+        focus_input = Prompt.ask("4. Your focus areas", default="")
         focus_areas = [f.strip() for f in focus_input.split(",")] if focus_input else []
-        
-        # 5. Location (for context-aware responses)
-        console.print("\n[bold]5. Your location (optional)[/bold]")
-        console.print("   This helps provide context-relevant information")
-        console.print("   (e.g., San Francisco, USA or London, UK)")
-        
-        location = Prompt.ask("Your location", default="")
+
+        location = Prompt.ask("5. Your location", default="")
         location = location if location else None
-        
-        # 6. Preferred Sources
-        console.print("\n[bold]6. What types of sources do you prefer?[/bold]")
-        console.print("   • academic: Research papers, scholarly articles")
-        console.print("   • news: News articles, current events")
-        console.print("   • blogs: Technical blogs, opinion pieces")
-        console.print("   • official docs: Official documentation, whitepapers")
-        console.print("   Enter comma-separated choices or press Enter for all")
-        
-        sources_input = Prompt.ask("Your preferred sources", default="")
+
+        sources_input = Prompt.ask("6. Your preferred sources", default="")
         preferred_sources = [s.strip() for s in sources_input.split(",")] if sources_input else []
-        
-        # 7. Time Sensitivity
-        console.print("\n[bold]7. How important is timeliness of information?[/bold]")
-        console.print("   • low: Established knowledge is fine")
-        console.print("   • moderate: Recent information preferred")
-        console.print("   • high: Need latest/real-time information")
-        
+
         time_sensitivity = Prompt.ask(
-            "Time sensitivity",
+            "7. Time sensitivity",
             choices=["low", "moderate", "high"],
             default="moderate"
         )
-        
+
         # Create preference object
         preferences = UserPreference(
             preferred_language="English",  # Default for now
@@ -162,7 +188,9 @@ def collect_user_preferences(interactive: bool = True) -> UserPreference:
             time_sensitivity=time_sensitivity,
             depth_preference=depth
         )
-        
+
+        _save_preferences(preferences)
+
         # Show summary
         console.print("\n" + "="*60)
         console.print(Panel(
@@ -263,7 +291,10 @@ class QAAgentOrchestrator:
                 "user_preferences": user_prefs_dict
             })
             
-            perception_output: PerceptionOutput = self.perception_agent.understand_query(query_input)
+            # Sync LLM call - run off the event loop so other requests proceed
+            perception_output: PerceptionOutput = await asyncio.to_thread(
+                self.perception_agent.understand_query, query_input
+            )
             reasoning_flow["perception"] = perception_output.reasoning_steps
             
             # Log perception output
@@ -284,7 +315,10 @@ class QAAgentOrchestrator:
             # Log memory input
             logger.log_memory_input({"from_perception": perception_output.model_dump()})
             
-            memory_output: MemoryOutput = self.memory_agent.retrieve_context(memory_input)
+            # Sync file I/O - run off the event loop
+            memory_output: MemoryOutput = await asyncio.to_thread(
+                self.memory_agent.retrieve_context, memory_input
+            )
             reasoning_flow["memory"] = memory_output.reasoning_steps
             
             # Log memory output
@@ -321,7 +355,10 @@ class QAAgentOrchestrator:
                     "previous_actions": previous_actions
                 }, iteration)
                 
-                decision_output: DecisionOutput = self.decision_agent.make_decision(decision_input)
+                # Sync LLM call - run off the event loop
+                decision_output: DecisionOutput = await asyncio.to_thread(
+                    self.decision_agent.make_decision, decision_input
+                )
                 
                 # Log decision output
                 logger.log_decision_output(decision_output.model_dump(), iteration)
@@ -472,7 +509,10 @@ class QAAgentOrchestrator:
 
 async def main():
     """Main entry point for the QA Agent"""
-    
+
+    # Attach handlers for the hot-path tool loggers (action.py etc.)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     # Load environment
     load_dotenv()
     api_key = os.getenv("GEMINI_API_KEY", "")
@@ -558,21 +598,22 @@ async def process_query_api(
     Returns:
         Dict with answer, confidence, sources, method, etc.
     """
+    orchestrator = None
     try:
         # Create UserPreference from dict if provided
         prefs = None
         if user_preferences:
             prefs = UserPreference(**user_preferences)
-        
+
         # Create orchestrator
         orchestrator = QAAgentOrchestrator(api_key, prefs)
-        
+
         # Process query
         response = await orchestrator.process_query(query, conversation_history)
-        
+
         # Return as dict
         return response.model_dump()
-        
+
     except Exception as e:
         return {
             "query": query,
@@ -583,6 +624,145 @@ async def process_query_api(
             "reasoning_flow": {},
             "user_preferences_applied": False
         }
+    finally:
+        # The orchestrator (and its ActionAgent) lives for one request -
+        # release the qa_tools subprocess now instead of parking it on
+        # the idle timer
+        if orchestrator is not None:
+            await orchestrator.action_agent.aclose()
+
+
+async def process_query_api_stream(
+    query: str,
+    api_key: str,
+    user_preferences: Optional[Dict] = None,
+    conversation_history: Optional[List[Dict]] = None
+):
+    """
+    Streaming variant of process_query_api
+
+    Yields stage events as they are produced instead of buffering the
+    whole pipeline, so callers can show progress immediately:
+    {"stage": "perception"|"memory"|"decision"|"action"} events, then
+    {"stage": "answer", "chunk": ...} pieces, then a final
+    {"stage": "complete", ...} event carrying the full result payload.
+    """
+    orchestrator = None
+    try:
+        prefs = UserPreference(**user_preferences) if user_preferences else None
+        orchestrator = QAAgentOrchestrator(api_key, prefs)
+
+        # --- PERCEPTION ---
+        query_input = QueryInput(
+            query=query,
+            conversation_history=conversation_history or []
+        )
+        perception_output = await asyncio.to_thread(
+            orchestrator.perception_agent.understand_query, query_input
+        )
+        yield {
+            "stage": "perception",
+            "intent": perception_output.analyzed_intent,
+            "query_type": perception_output.query_type
+        }
+
+        # --- MEMORY ---
+        memory_input = MemoryInput(
+            from_perception=perception_output,
+            conversation_history=conversation_history or []
+        )
+        memory_output = await asyncio.to_thread(
+            orchestrator.memory_agent.retrieve_context, memory_input
+        )
+        yield {
+            "stage": "memory",
+            "suggested_method": memory_output.suggested_method,
+            "context_summary": memory_output.context_summary
+        }
+
+        # --- DECISION ↔ ACTION LOOP ---
+        max_iterations = 3
+        previous_actions = []
+        final_action_output = None
+
+        for iteration in range(1, max_iterations + 1):
+            decision_input = DecisionInput(
+                from_memory=memory_output,
+                available_tools=orchestrator.decision_agent.available_tools,
+                previous_actions=previous_actions
+            )
+            # Streaming decision: tool calls are dispatched as the model
+            # emits them, so tool I/O overlaps decision generation; the
+            # full DecisionOutput lands in final_decision afterwards
+            final_decision = {}
+            tool_results = await orchestrator.action_agent.execute_tool_calls(
+                orchestrator.decision_agent.stream_tool_calls(
+                    decision_input, final=final_decision
+                )
+            )
+            decision_output = final_decision["decision"]
+            yield {
+                "stage": "decision",
+                "iteration": iteration,
+                "tool_calls": [tc.tool_name for tc in decision_output.tool_calls]
+            }
+
+            action_input = ActionInput(
+                from_decision=decision_output,
+                from_memory=memory_output
+            )
+            action_output = await orchestrator.action_agent.execute_actions(
+                action_input, tool_results=tool_results
+            )
+            yield {
+                "stage": "action",
+                "iteration": iteration,
+                "tool_results": [tr.result_summary for tr in action_output.tool_results]
+            }
+
+            for tool_result in action_output.tool_results:
+                previous_actions.append({
+                    "tool_name": tool_result.tool_name,
+                    "success": tool_result.success,
+                    "result_summary": tool_result.result_summary
+                })
+
+            final_action_output = action_output
+            if not action_output.needs_another_decision:
+                break
+
+        if not final_action_output or not final_action_output.final_answer:
+            raise Exception("No final answer generated")
+
+        orchestrator.memory_agent.save_conversation(
+            query=query,
+            answer=final_action_output.final_answer,
+            method=final_action_output.method,
+            confidence=final_action_output.confidence
+        )
+
+        # Stream the answer in chunks so clients can render progressively
+        answer = final_action_output.final_answer
+        chunk_size = 256
+        for start in range(0, len(answer), chunk_size):
+            yield {"stage": "answer", "chunk": answer[start:start + chunk_size]}
+
+        yield {
+            "stage": "complete",
+            "answer": answer,
+            "confidence": final_action_output.confidence,
+            "sources": final_action_output.sources,
+            "method": final_action_output.method,
+            "user_preferences_applied": prefs is not None
+        }
+
+    except Exception as e:
+        yield {"stage": "error", "error": str(e)}
+    finally:
+        # Per-request agent - release the qa_tools subprocess at the end
+        # of the stream rather than holding it on the idle timer
+        if orchestrator is not None:
+            await orchestrator.action_agent.aclose()
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Prepares enriched context for decision-making
 """
 import os
 import json
+from functools import cached_property
 from typing import List, Dict, Optional, Any
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -11,6 +12,9 @@ from rich.console import Console
 
 console = Console()
 
+# Word-overlap similarity required to reuse a past answer verbatim (CAG)
+CAG_SIMILARITY_THRESHOLD = 0.9
+
 # ============================================================================
 # PYDANTIC MODELS
 # ============================================================================
@@ -78,6 +82,48 @@ class MemoryOutput(BaseModel):
     reasoning_steps: List[str] = Field(default_factory=list, description="Memory reasoning steps")
     confidence: float = Field(..., ge=0, le=100, description="Confidence in context quality")
     
+    @cached_property
+    def extracted_keywords_sorted(self) -> tuple:
+        """Keywords in sorted order, computed once per output"""
+        return tuple(sorted(self.extracted_keywords))
+
+    @cached_property
+    def keywords_hash(self) -> int:
+        """Hash of the sorted keywords for cheap cache-key construction"""
+        return hash(self.extracted_keywords_sorted)
+
+    def cag_lookup(self, query: str, threshold: float = CAG_SIMILARITY_THRESHOLD) -> Optional[tuple]:
+        """
+        Cache-augmented generation check: reuse a past answer when a
+        relevant conversation entry asked essentially the same question
+
+        Returns (answer, sources, confidence) on a hit, None on a miss.
+        """
+        query_words = set(query.lower().split())
+        if not query_words:
+            return None
+
+        best_entry = None
+        best_score = 0.0
+        for entry in self.relevant_conversation:
+            past_words = set(entry.query.lower().split())
+            if not past_words:
+                continue
+            overlap = len(query_words & past_words) / len(query_words | past_words)
+            if overlap > best_score:
+                best_score = overlap
+                best_entry = entry
+
+        if best_entry is not None and best_score >= threshold and best_entry.answer:
+            # Reused answers get a small confidence boost - they were
+            # already generated and delivered for the same question
+            return (
+                best_entry.answer,
+                [f"Conversation Memory ({best_entry.method})"],
+                min(100.0, best_entry.confidence + 10)
+            )
+        return None
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -4,8 +4,8 @@ Includes system prompt evaluation and LLM-based query analysis
 """
 import os
 from typing import Dict, List, Optional
-from pydantic import BaseModel, Field
-from google import genai
+from pydantic import BaseModel, ConfigDict, Field
+from llm_client import get_client
 from rich.console import Console
 import json
 
@@ -25,9 +25,12 @@ class UserPreference(BaseModel):
     preferred_sources: List[str] = Field(default_factory=list, description="Preferred types of sources: academic, news, blogs, official docs")
     time_sensitivity: str = Field(default="moderate", description="How important timeliness is: low, moderate, high")
     depth_preference: str = Field(default="moderate", description="Depth of explanation: shallow, moderate, deep")
-    
-    class Config:
-        json_schema_extra = {
+
+    # Frozen: preferences are read-only once collected, so they can be
+    # shared and cached without defensive copies
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "preferred_language": "English",
                 "expertise_level": "intermediate",
@@ -39,6 +42,7 @@ class UserPreference(BaseModel):
                 "depth_preference": "deep"
             }
         }
+    )
 
 
 class QueryInput(BaseModel):
@@ -87,7 +91,7 @@ class PerceptionAgent:
     
     def __init__(self, api_key: str, user_preferences: Optional[UserPreference] = None):
         """Initialize perception agent with API key and optional user preferences"""
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client(api_key)
         self.user_preferences = user_preferences
         self.system_prompt = self._build_system_prompt()
         
@@ -7,6 +7,8 @@ from rich import box
 import json
 import re
 import os
+import asyncio
+import threading
 from datetime import datetime
 from typing import List, Dict, Any
 import hashlib
@@ -20,6 +22,13 @@ os.makedirs(STORAGE_DIR, exist_ok=True)
 DOCS_FILE = os.path.join(STORAGE_DIR, "documents.json")
 MEMORY_FILE = os.path.join(STORAGE_DIR, "memory.json")
 
+# Characters of document content included in content_preview fields
+PREVIEW_CHARS = 500
+
+# batch_execute runs tools on thread-pool workers; serialize the
+# load -> mutate -> save sections so concurrent stores don't lose writes
+_store_lock = threading.Lock()
+
 # Load from files or initialize empty
 def load_storage():
     global document_store, memory_store
@@ -186,8 +195,21 @@ def retrieve_documents(keywords: List[str], limit: int = 5) -> TextContent:
         
         console.print(table)
         
+        # Attach a pre-capped preview so downstream consumers never have to
+        # slice (or even parse) the full document body; full content stays in
+        # place for callers that need it
+        response_docs = []
+        for item in top_docs:
+            doc = dict(item['document'])
+            content = doc.get('content', '')
+            doc['content_preview'] = (
+                content if len(content) <= PREVIEW_CHARS
+                else content[:PREVIEW_CHARS] + '...'
+            )
+            response_docs.append(doc)
+
         result = {
-            "documents": [item['document'] for item in top_docs],
+            "documents": response_docs,
             "count": len(top_docs),
             "total_in_store": len(document_store)
         }
@@ -226,10 +248,8 @@ def store_document(title: str, content: str, url: str = "", metadata: dict = Non
     console.print(f"[blue]Title:[/blue] {title}")
     
     try:
-        load_storage()  # Load latest before storing
-        
         doc_id = hashlib.md5(f"{title}{content}".encode()).hexdigest()
-        
+
         document = {
             "id": doc_id,
             "title": title,
@@ -239,18 +259,21 @@ def store_document(title: str, content: str, url: str = "", metadata: dict = Non
             "stored_at": datetime.now().isoformat(),
             "access_count": 0
         }
-        
-        # Check for duplicates
-        existing = [d for d in document_store if d['id'] == doc_id]
-        if existing:
-            console.print("[yellow]Warning:[/yellow] Document already exists, updating...")
-            document_store.remove(existing[0])
-        
-        document_store.append(document)
-        
-        # Save to file for persistence
-        save_documents()
-        
+
+        with _store_lock:
+            load_storage()  # Load latest before storing
+
+            # Check for duplicates
+            existing = [d for d in document_store if d['id'] == doc_id]
+            if existing:
+                console.print("[yellow]Warning:[/yellow] Document already exists, updating...")
+                document_store.remove(existing[0])
+
+            document_store.append(document)
+
+            # Save to file for persistence
+            save_documents()
+
         console.print(Panel(
             f"[green]✓ Document stored successfully[/green]\n"
             f"ID: {doc_id[:12]}...\n"
@@ -276,6 +299,60 @@ def store_document(title: str, content: str, url: str = "", metadata: dict = Non
             text=f"Error: {str(e)}"
         )
 
+@mcp.tool()
+def store_documents(documents: List[dict]) -> TextContent:
+    """Store multiple documents in one call, saving to disk once at the end"""
+    console.print("[blue]FUNCTION CALL:[/blue] store_documents()")
+    console.print(f"[blue]Batch size:[/blue] {len(documents)}")
+
+    try:
+        with _store_lock:
+            load_storage()  # Load latest before storing
+
+            stored = 0
+            for item in documents:
+                title = item.get("title", "Untitled")
+                content = item.get("content", "")
+                doc_id = hashlib.md5(f"{title}{content}".encode()).hexdigest()
+
+                document = {
+                    "id": doc_id,
+                    "title": title,
+                    "content": content,
+                    "url": item.get("url", ""),
+                    "metadata": item.get("metadata") or {},
+                    "stored_at": datetime.now().isoformat(),
+                    "access_count": 0
+                }
+
+                # Check for duplicates
+                existing = [d for d in document_store if d['id'] == doc_id]
+                if existing:
+                    document_store.remove(existing[0])
+
+                document_store.append(document)
+                stored += 1
+
+            # Single save amortizes the file write across the whole batch
+            save_documents()
+
+        console.print(f"[green]✓ Stored batch of {stored} documents[/green]")
+
+        return TextContent(
+            type="text",
+            text=json.dumps({
+                "success": True,
+                "stored": stored,
+                "total_documents": len(document_store)
+            })
+        )
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        return TextContent(
+            type="text",
+            text=f"Error: {str(e)}"
+        )
+
 @mcp.tool()
 def store_in_memory(key: str, value: str, category: str = "general") -> TextContent:
     """Store information in memory for quick recall"""
@@ -284,8 +361,6 @@ def store_in_memory(key: str, value: str, category: str = "general") -> TextCont
     console.print(f"[blue]Category:[/blue] {category}")
     
     try:
-        load_storage()  # Load latest before storing
-        
         memory_item = {
             "key": key,
             "value": value,
@@ -293,17 +368,20 @@ def store_in_memory(key: str, value: str, category: str = "general") -> TextCont
             "stored_at": datetime.now().isoformat(),
             "access_count": 0
         }
-        
-        # Update if exists
-        existing = [m for m in memory_store if m['key'] == key]
-        if existing:
-            memory_store.remove(existing[0])
-        
-        memory_store.append(memory_item)
-        
-        # Save to file for persistence
-        save_memory()
-        
+
+        with _store_lock:
+            load_storage()  # Load latest before storing
+
+            # Update if exists
+            existing = [m for m in memory_store if m['key'] == key]
+            if existing:
+                memory_store.remove(existing[0])
+
+            memory_store.append(memory_item)
+
+            # Save to file for persistence
+            save_memory()
+
         console.print(f"[green]✓ Stored in memory:[/green] {key} = {value[:50]}...")
         
         return TextContent(
@@ -529,6 +607,63 @@ def get_statistics() -> TextContent:
             text=f"Error: {str(e)}"
         )
 
+@mcp.tool()
+async def batch_execute(calls: List[Dict[str, Any]], max_concurrent: int = 8, stop_on_error: bool = False) -> TextContent:
+    """Execute multiple tool calls in a single request to amortize JSON-RPC round-trips"""
+    console.print("[blue]FUNCTION CALL:[/blue] batch_execute()")
+    console.print(f"[blue]Calls:[/blue] {len(calls)}")
+
+    dispatch = {
+        "analyze_query": analyze_query,
+        "retrieve_documents": retrieve_documents,
+        "store_document": store_document,
+        "store_documents": store_documents,
+        "store_in_memory": store_in_memory,
+        "retrieve_from_memory": retrieve_from_memory,
+        "generate_response": generate_response,
+        "verify_answer": verify_answer,
+        "get_statistics": get_statistics,
+    }
+
+    semaphore = asyncio.Semaphore(max(max_concurrent, 1))
+
+    async def run_one(call: Dict[str, Any]) -> Dict[str, Any]:
+        tool = call.get("tool")
+        args = call.get("args") or {}
+        fn = dispatch.get(tool)
+        if fn is None:
+            return {"tool": tool, "success": False, "error": f"Unknown tool: {tool}"}
+        async with semaphore:
+            try:
+                result = await asyncio.to_thread(fn, **args)
+                return {"tool": tool, "success": True, "result": json.loads(result.text)}
+            except Exception as e:
+                return {"tool": tool, "success": False, "error": str(e)}
+
+    try:
+        if stop_on_error:
+            results = []
+            for call in calls:
+                item = await run_one(call)
+                results.append(item)
+                if not item["success"]:
+                    break
+        else:
+            results = list(await asyncio.gather(*(run_one(call) for call in calls)))
+
+        console.print(f"[green]✓ Batch complete: {sum(1 for r in results if r['success'])}/{len(results)} succeeded[/green]")
+
+        return TextContent(
+            type="text",
+            text=json.dumps({"results": results, "count": len(results)})
+        )
+    except Exception as e:
+        console.print(f"[red]Error:[/red] {str(e)}")
+        return TextContent(
+            type="text",
+            text=f"Error: {str(e)}"
+        )
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1 and sys.argv[1] == "dev":
@@ -0,0 +1,260 @@
+"""
+Semantic Cache Module - Caches final answers keyed by query meaning
+Near-duplicate queries skip the Gemini round trip entirely
+"""
+import os
+import json
+import math
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple, Any
+from rich.console import Console
+
+console = Console()
+
+# Cosine similarity required to treat two queries as equivalent
+DEFAULT_SIMILARITY_THRESHOLD = 0.93
+
+# How long a cached answer stays valid (seconds)
+DEFAULT_TTL_SECONDS = 3600
+
+# Maximum entries kept before the oldest are evicted
+DEFAULT_MAX_ENTRIES = 256
+
+EMBEDDING_MODEL = "text-embedding-004"
+
+
+def _prefs_signature(user_prefs: Optional[Dict]) -> str:
+    """Canonical signature for user preferences (sorted keys, stable JSON)"""
+    if not user_prefs:
+        return "{}"
+    return json.dumps(user_prefs, sort_keys=True, default=str)
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Cosine similarity between two embedding vectors"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0.0 or norm_b == 0.0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class SemanticCache:
+    """
+    Semantic cache for generated answers
+
+    Two-level lookup:
+    1. Exact match on md5 of (query + method + prefs signature) - ~free
+    2. Embedding similarity search over cached entries with the same
+       (method, prefs signature), accepted above a cosine threshold
+
+    Entries are persisted to storage/semantic_cache.json so warm answers
+    survive process restarts, mirroring the document/memory stores.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        storage_dir: str = None,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """Initialize cache with a genai client for embeddings"""
+        self.client = client
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        if storage_dir is None:
+            storage_dir = os.path.join(os.path.dirname(__file__), "storage")
+        os.makedirs(storage_dir, exist_ok=True)
+        self.cache_file = os.path.join(storage_dir, "semantic_cache.json")
+
+        # lookup/store run on to_thread workers - guard _entries
+        self._lock = threading.Lock()
+        self._entries: List[Dict] = self._load_entries()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load_entries(self) -> List[Dict]:
+        """Load cached entries from storage"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            console.print(f"[yellow]⚠️  Error loading semantic cache: {e}[/yellow]")
+        return []
+
+    def _save_entries(self):
+        """Save cached entries to storage (caller holds _lock)
+
+        The file may have been rewritten by another process (or another
+        instance) since our load, so fold its entries in first instead
+        of clobbering them with our in-memory snapshot.
+        """
+        try:
+            self._merge_disk_entries()
+            with open(self.cache_file, 'w') as f:
+                json.dump(self._entries, f)
+        except Exception as e:
+            console.print(f"[yellow]⚠️  Error saving semantic cache: {e}[/yellow]")
+
+    def _merge_disk_entries(self):
+        """Merge entries from disk into _entries, newest per exact key"""
+        by_key: Dict[str, Dict] = {}
+        for entry in self._load_entries() + self._entries:
+            key = entry.get("exact_key")
+            current = by_key.get(key)
+            if current is None or entry.get("stored_at", 0) >= current.get("stored_at", 0):
+                by_key[key] = entry
+        merged = [e for e in by_key.values() if self._is_fresh(e)]
+        merged.sort(key=lambda e: e.get("stored_at", 0))
+        self._entries = merged[-self.max_entries:]
+
+    # ------------------------------------------------------------------
+    # Keys and embeddings
+    # ------------------------------------------------------------------
+
+    def _exact_key(self, query: str, method: str, prefs_sig: str) -> str:
+        """md5 key for the exact-match fast path"""
+        return hashlib.md5(f"{query}|{method}|{prefs_sig}".encode()).hexdigest()
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """Compute an embedding for the cache key text; None on failure"""
+        try:
+            response = self.client.models.embed_content(
+                model=EMBEDDING_MODEL,
+                contents=text
+            )
+            return list(response.embeddings[0].values)
+        except Exception as e:
+            console.print(f"[yellow]⚠️  Embedding unavailable, exact-match cache only: {e}[/yellow]")
+            return None
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        """Check whether an entry is within its TTL"""
+        return (time.time() - entry.get("stored_at", 0)) < self.ttl_seconds
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def lookup(
+        self,
+        query: str,
+        method: str,
+        user_prefs: Optional[Dict]
+    ) -> Optional[Tuple[str, List[str], float]]:
+        """
+        Look up a cached (answer, sources, confidence) for a query
+
+        Returns None on miss or when all candidates are expired.
+        """
+        prefs_sig = _prefs_signature(user_prefs)
+        exact_key = self._exact_key(query, method, prefs_sig)
+
+        with self._lock:
+            # Drop expired entries lazily
+            live_entries = [e for e in self._entries if self._is_fresh(e)]
+            if len(live_entries) != len(self._entries):
+                self._entries = live_entries
+                self._save_entries()
+
+            # Level 1: exact match
+            for entry in self._entries:
+                if entry.get("exact_key") == exact_key:
+                    console.print("[green]✓ Semantic cache: exact hit[/green]")
+                    return (entry["answer"], entry["sources"], entry["confidence"])
+
+            # Level 2: embedding similarity within same (method, prefs)
+            # bucket - snapshot the candidates so the embedding round
+            # trip happens outside the lock
+            candidates = [
+                e for e in self._entries
+                if e.get("method") == method and e.get("prefs_sig") == prefs_sig and e.get("embedding")
+            ]
+        if not candidates:
+            return None
+
+        query_emb = self._embed(query)
+        if query_emb is None:
+            return None
+
+        best_entry = None
+        best_score = 0.0
+        for entry in candidates:
+            score = _cosine_similarity(query_emb, entry["embedding"])
+            if score > best_score:
+                best_score = score
+                best_entry = entry
+
+        if best_entry is not None and best_score >= self.threshold:
+            console.print(f"[green]✓ Semantic cache: similarity hit ({best_score:.3f})[/green]")
+            return (best_entry["answer"], best_entry["sources"], best_entry["confidence"])
+
+        return None
+
+    def store(
+        self,
+        query: str,
+        method: str,
+        user_prefs: Optional[Dict],
+        answer: str,
+        sources: List[str],
+        confidence: float
+    ):
+        """Store a generated answer for future lookups"""
+        prefs_sig = _prefs_signature(user_prefs)
+
+        # Embed before taking the lock - blocking HTTP round trip
+        entry = {
+            "exact_key": self._exact_key(query, method, prefs_sig),
+            "query": query,
+            "method": method,
+            "prefs_sig": prefs_sig,
+            "embedding": self._embed(query),
+            "answer": answer,
+            "sources": sources,
+            "confidence": confidence,
+            "stored_at": time.time()
+        }
+
+        with self._lock:
+            # Replace any existing entry for the same exact key
+            self._entries = [e for e in self._entries if e.get("exact_key") != entry["exact_key"]]
+            self._entries.append(entry)
+
+            # Evict oldest entries beyond capacity
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
+
+            self._save_entries()
+
+
+# Process-wide instances keyed by cache file. Independent instances on
+# the same file each held their own _entries list and clobbered each
+# other's writes on save; sharing one keeps the view consistent
+_shared: Dict[str, SemanticCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_semantic_cache(client: Any, storage_dir: str = None, **kwargs) -> SemanticCache:
+    """The shared SemanticCache for a storage location (created on first use)"""
+    if storage_dir is None:
+        storage_dir = os.path.join(os.path.dirname(__file__), "storage")
+    key = os.path.join(storage_dir, "semantic_cache.json")
+    with _shared_lock:
+        cache = _shared.get(key)
+        if cache is None:
+            cache = SemanticCache(client, storage_dir=storage_dir, **kwargs)
+            _shared[key] = cache
+        return cache